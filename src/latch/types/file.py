@@ -1,17 +1,22 @@
+import itertools
 import os
 import re
 from os import PathLike
 from pathlib import Path
-from typing import Optional, Type, Union
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Set, Type, Union
 from urllib.parse import urlparse
 
-import gql
+import graphql.language as l
 from flytekit.core.annotation import FlyteAnnotation
 from flytekit.core.context_manager import FlyteContext, FlyteContextManager
 from flytekit.core.type_engine import TypeEngine, TypeTransformer
 from flytekit.models.literals import Literal
 from flytekit.types.file.file import FlyteFile, FlyteFilePathTransformer
+from gql.transport.exceptions import TransportError, TransportQueryError
 from latch_sdk_gql.execute import execute
+from latch_sdk_gql.utils import _name_node, _parse_selection
+from requests.exceptions import RequestException
 from typing_extensions import Annotated
 
 from latch.ldata.path import LPath
@@ -19,6 +24,158 @@ from latch.types.utils import format_path, is_absolute_node_path, is_valid_url
 from latch_cli.utils.path import normalize_path
 
 
+class _PathResolver:
+    """Batches node path -> name lookups for `LatchFile` downloads.
+
+    Node paths are registered when a `LatchFile` is created and resolved
+    together, a batch at a time, when any of them is first needed. Names are
+    dropped once they have been looked up.
+    """
+
+    batch_size = 100
+    max_pending = 1000
+
+    def __init__(self):
+        self._lock = Lock()
+        self._pending: Set[str] = set()
+        self._names: Dict[str, Optional[str]] = {}
+
+    def add(self, path: str):
+        with self._lock:
+            # past the limit, paths are resolved one at a time when needed
+            if path not in self._names and len(self._pending) < self.max_pending:
+                self._pending.add(path)
+
+    def get(self, path: str) -> Optional[str]:
+        with self._lock:
+            if path in self._names:
+                return self._names.pop(path)
+
+            self._pending.discard(path)
+            batch = [path, *itertools.islice(self._pending, self.batch_size - 1)]
+            self._pending.difference_update(batch)
+
+        # note: queries run without the lock so that concurrent downloads do
+        # not wait on each other's round-trips
+        names = self._try_resolve_batch(batch)
+        if path not in names:
+            # the batch failed (e.g. one of the other paths is invalid) so only
+            # resolve the path that was actually asked for
+            return self._resolve_one(path)
+
+        name = names.pop(path)
+        self._store(names)
+        return name
+
+    def flush(self):
+        while True:
+            with self._lock:
+                batch = list(itertools.islice(self._pending, self.batch_size))
+                self._pending.difference_update(batch)
+
+            if len(batch) == 0:
+                return
+
+            self._store(self._try_resolve_batch(batch))
+
+    def _store(self, names: Dict[str, Optional[str]]):
+        with self._lock:
+            # names that were never looked up would otherwise pile up forever
+            if len(self._names) + len(names) > self.max_pending:
+                self._names.clear()
+
+            self._names.update(names)
+
+    def _try_resolve_batch(self, paths: List[str]) -> Dict[str, Optional[str]]:
+        try:
+            return self._resolve_batch(paths)
+        except (TransportError, TransportQueryError, RequestException):
+            return {}
+
+    @staticmethod
+    def _resolve_batch(paths: List[str]) -> Dict[str, Optional[str]]:
+        sels: List[l.FieldNode] = []
+        for i, path in enumerate(paths):
+            sel = _parse_selection("""
+                ldataResolvePathData(argPath: {}) {
+                    name
+                }
+            """)
+            assert isinstance(sel, l.FieldNode)
+
+            val = l.StringValueNode()
+            val.value = path
+
+            args = l.ArgumentNode()
+            args.name = _name_node("argPath")
+            args.value = val
+
+            sel.alias = _name_node(f"q{i}")
+            sel.arguments = (args,)
+
+            sels.append(sel)
+
+        sel_set = l.SelectionSetNode()
+        sel_set.selections = tuple(sels)
+
+        doc = l.parse("""
+            query getNames {
+                placeholder
+            }
+            """)
+
+        assert len(doc.definitions) == 1
+        query = doc.definitions[0]
+
+        assert isinstance(query, l.OperationDefinitionNode)
+        query.selection_set = sel_set
+
+        # failures fall back to per-path lookups, so don't retry the batch
+        res = execute(doc, max_retries=0)
+
+        ret: Dict[str, Optional[str]] = {}
+        for i, path in enumerate(paths):
+            data = res[f"q{i}"]
+            ret[path] = data["name"] if data is not None else None
+
+        return ret
+
+    @staticmethod
+    def _resolve_one(path: str) -> Optional[str]:
+        data = execute(
+            """
+            query getName($argPath: String!) {
+                ldataResolvePathData(argPath: $argPath) {
+                    name
+                }
+            }
+            """,
+            {"argPath": path},
+            use_cache=True,
+        )["ldataResolvePathData"]
+
+        if data is None:
+            return None
+
+        return data["name"]
+
+
+_path_resolver = _PathResolver()
+
+
+def prefetch(files: Iterable["LatchFile"]):
+    """Resolve the local names of many node-path `LatchFile`s in one request.
+
+    Downloads of `files` after this call will not need to query the Latch API
+    to determine their local file names.
+    """
+    for f in files:
+        if f.remote_path is not None and is_absolute_node_path.match(f.remote_path):
+            _path_resolver.add(f.remote_path)
+
+    _path_resolver.flush()
+
+
 class LatchFile(FlyteFile):
     """Represents a file object in the context of a task execution.
 
@@ -86,6 +243,11 @@ class LatchFile(FlyteFile):
         if kwargs.get("downloader") is not None:
             super().__init__(self.path, kwargs["downloader"], self._remote_path)
         else:
+            if (
+                self._remote_path is not None
+                and is_absolute_node_path.match(self._remote_path) is not None
+            ):
+                _path_resolver.add(self._remote_path)
 
             def downloader():
                 ctx = FlyteContextManager.current_context()
@@ -98,21 +260,11 @@ class LatchFile(FlyteFile):
                 ):
                     local_path_hint = self._remote_path
                     if is_absolute_node_path.match(self._remote_path) is not None:
-                        data = execute(
-                            gql.gql("""
-                            query getName($argPath: String!) {
-                                ldataResolvePathData(argPath: $argPath) {
-                                    name
-                                }
-                            }
-                            """),
-                            {"argPath": self._remote_path},
-                        )["ldataResolvePathData"]
-
-                        if data is not None and data["name"] is not None:
-                            local_path_hint = data["name"]
-
-                    self._idempotent_set_path(local_path_hint)
+                        name = _path_resolver.get(self._remote_path)
+                        if name is not None:
+                            local_path_hint = name
+
+                    self._idempotent_set_path(local_path_hint, ctx=ctx)
 
                     return ctx.file_access.get_data(
                         self._remote_path,
@@ -125,11 +277,14 @@ class LatchFile(FlyteFile):
     def size(self):
         return LPath(self.remote_path).size()
 
-    def _idempotent_set_path(self, hint: Optional[str] = None):
+    def _idempotent_set_path(
+        self, hint: Optional[str] = None, *, ctx: Optional[FlyteContext] = None
+    ):
         if self._path_generated:
             return
 
-        ctx = FlyteContextManager.current_context()
+        if ctx is None:
+            ctx = FlyteContextManager.current_context()
         if ctx is None:
             return
 
@@ -159,18 +314,35 @@ class LatchFile(FlyteFile):
         return self._remote_path
 
     def __repr__(self):
+        # note: `format_path` may need to query the Latch API, so cache the
+        # result until either path changes
+        key = (self.path, self.remote_path)
+        cached = getattr(self, "_repr_cache", None)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
         if self.remote_path is None:
-            return f"LatchFile({repr(format_path(self.local_path))})"
+            res = f"LatchFile({repr(format_path(self.local_path))})"
+        else:
+            res = (
+                f"LatchFile({repr(self.path)},"
+                f" remote_path={repr(format_path(self.remote_path))})"
+            )
 
-        return (
-            f"LatchFile({repr(self.path)},"
-            f" remote_path={repr(format_path(self.remote_path))})"
-        )
+        self._repr_cache = (key, res)
+        return res
 
     def __str__(self):
         if self.remote_path is None:
             return "LatchFile()"
-        return f"LatchFile({format_path(self.remote_path)})"
+
+        cached = getattr(self, "_str_cache", None)
+        if cached is not None and cached[0] == self.remote_path:
+            return cached[1]
+
+        res = f"LatchFile({format_path(self.remote_path)})"
+        self._str_cache = (self.remote_path, res)
+        return res
 
 
 LatchOutputFile = Annotated[
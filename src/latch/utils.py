@@ -1,6 +1,8 @@
 import itertools
+import json
 import os
-from typing import Dict, TypedDict
+import time
+from typing import Dict, Optional, TypedDict
 
 import gql
 import jwt
@@ -47,13 +49,59 @@ class WSInfo(TypedDict):
     default: bool
 
 
+_workspaces_cache_ttl = 5 * 60
+
+
+def _load_cached_workspaces(account_id: str) -> Optional[Dict[str, WSInfo]]:
+    cache_path = user_config.root / "workspaces.json"
+    try:
+        if time.time() - cache_path.stat().st_mtime > _workspaces_cache_ttl:
+            return None
+
+        data = json.loads(cache_path.read_text())
+    except (OSError, ValueError):
+        return None
+
+    # the cache is per-user, a different account may have logged in since
+    if not isinstance(data, dict) or data.get("account_id") != account_id:
+        return None
+
+    workspaces = data.get("workspaces")
+    if not isinstance(workspaces, dict) or not all(
+        isinstance(ws, dict) and ws.keys() >= WSInfo.__annotations__.keys()
+        for ws in workspaces.values()
+    ):
+        # written by an older version or otherwise malformed
+        return None
+
+    return workspaces
+
+
+def _save_cached_workspaces(account_id: str, workspaces: Dict[str, WSInfo]):
+    cache_path = user_config.root / "workspaces.json"
+    try:
+        tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"account_id": account_id, "workspaces": workspaces}))
+        os.replace(tmp, cache_path)
+    except OSError:
+        # the cache is only an optimization
+        ...
+
+
 def get_workspaces() -> Dict[str, WSInfo]:
     """Retrieve workspaces that user can access.
 
+    Results are cached in the user's Latch config directory for a few minutes.
+
     Returns:
         A dictionary mapping workspace IDs to workspace display names.
     """
     account_id = account_id_from_token(retrieve_or_login())
+
+    cached = _load_cached_workspaces(account_id)
+    if cached is not None:
+        return cached
+
     res = execute(
         gql.gql("""
             query GetWorkspaces($accountId: BigInt!) {
@@ -139,6 +187,8 @@ def get_workspaces() -> Dict[str, WSInfo]:
         + member_org_teams
     }
 
+    _save_cached_workspaces(account_id, teams)
+
     return teams
 
 
@@ -157,8 +207,10 @@ def current_workspace() -> str:
     if ws != "":
         return ws
 
+    # note: this is called repeatedly over the course of a single command and
+    # the default account does not change in that time
     res = execute(
-        gql.gql("""
+        """
             query DefaultAccountQuery {
                 accountInfoCurrent {
                     id
@@ -167,7 +219,9 @@ def current_workspace() -> str:
                     }
                 }
             }
-        """),
+        """,
+        use_cache=True,
+        ttl=300,
     )["accountInfoCurrent"]
 
     ws = res["id"]
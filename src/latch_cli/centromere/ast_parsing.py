@@ -1,4 +1,6 @@
 import ast
+import hashlib
+import json
 import os
 import traceback
 from dataclasses import dataclass
@@ -83,7 +85,65 @@ class Visitor(ast.NodeVisitor):
         return self.generic_visit(node)
 
 
-def get_flyte_objects(module: Path) -> list[FlyteObject]:
+def _decorators_digest() -> str:
+    # cached results depend on which decorators count as tasks, which changes
+    # with the installed SDK
+    return hashlib.sha256(json.dumps(sorted(task_decorators)).encode()).hexdigest()
+
+
+def _load_cache(cache_path: Path) -> dict[str, dict]:
+    try:
+        data = json.loads(cache_path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+    if (
+        not isinstance(data, dict)
+        or data.get("version") != 1
+        or data.get("task_decorators") != _decorators_digest()
+    ):
+        return {}
+
+    files = data.get("files")
+    if not isinstance(files, dict):
+        return {}
+
+    return files
+
+
+def _save_cache(cache_path: Path, files: dict[str, dict]):
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(
+            json.dumps({
+                "version": 1,
+                "task_decorators": _decorators_digest(),
+                "files": files,
+            })
+        )
+        os.replace(tmp, cache_path)
+    except OSError:
+        # the cache is only an optimization
+        ...
+
+
+def get_flyte_objects(
+    module: Path, *, cache_path: Optional[Path] = None
+) -> list[FlyteObject]:
+    """Find the tasks and workflows defined in a module by parsing its source.
+
+    If `cache_path` is given, the objects found in each file are persisted
+    there keyed on the file's mtime and size, and files that have not changed
+    since the last call are not re-parsed.
+    """
+    cached: dict[str, dict] = {}
+    if cache_path is not None:
+        cached = _load_cache(cache_path)
+
+    files: dict[str, dict] = {}
+
     res: list[FlyteObject] = []
     queue: Queue[Path] = Queue()
     queue.put(module)
@@ -106,6 +166,25 @@ def get_flyte_objects(module: Path) -> list[FlyteObject]:
             os.sep, "."
         )
 
+        st = file.stat()
+        entry = cached.get(str(file))
+        if (
+            entry is not None
+            and entry["module_name"] == module_name
+            and entry["mtime_ns"] == st.st_mtime_ns
+            and entry["size"] == st.st_size
+        ):
+            files[str(file)] = entry
+            res.extend(
+                FlyteObject(
+                    x["type"],
+                    x["name"],
+                    Path(x["dockerfile"]) if x["dockerfile"] is not None else None,
+                )
+                for x in entry["objects"]
+            )
+            continue
+
         v = Visitor(file, module_name)
 
         try:
@@ -121,4 +200,23 @@ def get_flyte_objects(module: Path) -> list[FlyteObject]:
 
         res.extend(v.flyte_objects)
 
+        files[str(file)] = {
+            "module_name": module_name,
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "objects": [
+                {
+                    "type": x.type,
+                    "name": x.name,
+                    "dockerfile": (
+                        str(x.dockerfile) if x.dockerfile is not None else None
+                    ),
+                }
+                for x in v.flyte_objects
+            ],
+        }
+
+    if cache_path is not None and files != cached:
+        _save_cache(cache_path, files)
+
     return res
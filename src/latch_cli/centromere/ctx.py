@@ -1,10 +1,11 @@
-import re
 import sys
 import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
+from functools import cached_property
 from pathlib import Path
 from textwrap import dedent
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import click
 import docker
@@ -20,7 +21,11 @@ from latch_cli.centromere.utils import (
     _construct_dkr_client,
     _construct_ssh_client,
 )
-from latch_cli.constants import docker_image_name_illegal_pat, latch_constants
+from latch_cli.constants import (
+    docker_image_name_illegal_pat,
+    docker_image_tag_pat,
+    latch_constants,
+)
 from latch_cli.docker_utils import get_default_dockerfile
 from latch_cli.utils import (
     WorkflowType,
@@ -95,6 +100,8 @@ class _CentromereCtx:
         self.disable_auto_version = disable_auto_version
         self.wf_module = wf_module if wf_module is not None else "wf"
 
+        pool = ThreadPoolExecutor(max_workers=2)
+        keygen_fut: Optional["Future[str]"] = None
         try:
             self.token = retrieve_or_login()
             self.account_id = current_workspace()
@@ -151,30 +158,32 @@ class _CentromereCtx:
                     fg="yellow",
                 )
 
+            # the content hash is only needed for the final version string, so
+            # compute it while the workflow entities are being loaded. Its
+            # output is replayed on this thread once it is needed.
+            #
+            # note: a running hash cannot be cancelled, so on failure the
+            # interpreter still waits for it to finish before exiting
+            hash_fut: Optional["Future[str]"] = None
+            hash_output: List[Tuple[Tuple[Any, ...], Dict[str, Any]]] = []
             if not self.disable_auto_version:
-                hash = ""
-
-                if self.git_commit_hash is not None:
-                    hash += f"-{self.git_commit_hash[:6]}"
-                    if self.git_is_dirty:
-                        click.secho(
-                            dedent("""
-                            The git repository is dirty. The version will be suffixed
-                            with '-wip' until the changes are committed or removed.
-                            """),
-                            fg="yellow",
-                        )
-                        hash += "-wip"
-
-                hash += f"-{hash_directory(self.pkg_root)[:6]}"
-
-                self.version = f"{self.version}{hash}"
+                hash_fut = pool.submit(
+                    hash_directory,
+                    self.pkg_root,
+                    cache_path=self.pkg_root / ".latch" / "hash.cache",
+                    echo=lambda *args, **kwargs: hash_output.append((args, kwargs)),
+                )
 
-            self.container_map: Dict[str, _Container] = {}
+            # container images are named after the final version, so they are
+            # only created once the hash is known
+            task_dockerfiles: Dict[str, Path] = {}
 
             if self.workflow_type == WorkflowType.latchbiosdk:
                 try:
-                    flyte_objects = get_flyte_objects(self.pkg_root / self.wf_module)
+                    flyte_objects = get_flyte_objects(
+                        self.pkg_root / self.wf_module,
+                        cache_path=self.pkg_root / ".latch" / "flyte_objects.cache",
+                    )
                 except ModuleNotFoundError as e:
                     click.secho(
                         dedent(
@@ -231,11 +240,7 @@ class _CentromereCtx:
 
                         raise click.exceptions.Exit(1)
 
-                    self.container_map[obj.name] = _Container(
-                        dockerfile=obj.dockerfile,
-                        image_name=self.task_image_name(obj.name),
-                        pkg_dir=obj.dockerfile.parent,
-                    )
+                    task_dockerfiles[obj.name] = obj.dockerfile
 
             elif self.workflow_type == WorkflowType.snakemake:
                 assert snakefile is not None
@@ -380,6 +385,44 @@ class _CentromereCtx:
 
             assert self.workflow_name is not None
 
+            if hash_fut is not None:
+                hash = ""
+
+                if self.git_commit_hash is not None:
+                    hash += f"-{self.git_commit_hash[:6]}"
+                    if self.git_is_dirty:
+                        click.secho(
+                            dedent("""
+                            The git repository is dirty. The version will be suffixed
+                            with '-wip' until the changes are committed or removed.
+                            """),
+                            fg="yellow",
+                        )
+                        hash += "-wip"
+
+                content_hash = hash_fut.result()
+                for args, kwargs in hash_output:
+                    click.secho(*args, **kwargs)
+
+                hash += f"-{content_hash[:6]}"
+
+                self.version = f"{self.version}{hash}"
+
+            self.container_map: Dict[str, _Container] = {
+                name: _Container(
+                    dockerfile=dockerfile,
+                    image_name=self.task_image_name(name),
+                    pkg_dir=dockerfile.parent,
+                )
+                for name, dockerfile in task_dockerfiles.items()
+            }
+
+            dkr_fut: Optional["Future[docker.APIClient]"] = None
+            if not remote:
+                # the local docker client queries the daemon for its API
+                # version on construction, overlap that with the version check
+                dkr_fut = pool.submit(_construct_dkr_client)
+
             if self.nucleus_check_version(self.version, self.workflow_name):
                 click.secho(
                     f"\nVersion ({self.version}) already exists."
@@ -389,6 +432,16 @@ class _CentromereCtx:
                 )
                 sys.exit(1)
 
+            if remote:
+                # only create the key once the version is known to be new
+                self.ssh_key_path = self.pkg_root / ".latch/ssh_key"
+                self.jump_key_path = self.pkg_root / ".latch/jump_key"
+                keygen_fut = pool.submit(
+                    generate_temporary_ssh_credentials,
+                    self.ssh_key_path,
+                    add_to_agent=False,
+                )
+
             self.default_container = _Container(
                 dockerfile=get_default_dockerfile(
                     self.pkg_root, wf_type=self.workflow_type
@@ -397,13 +450,9 @@ class _CentromereCtx:
                 pkg_dir=self.pkg_root,
             )
 
-            if remote:
+            if keygen_fut is not None:
                 # todo(maximsmol): connect only AFTER confirming registration
-                self.ssh_key_path = self.pkg_root / ".latch/ssh_key"
-                self.jump_key_path = self.pkg_root / ".latch/jump_key"
-                self.public_key = generate_temporary_ssh_credentials(
-                    self.ssh_key_path, add_to_agent=False
-                )
+                self.public_key = keygen_fut.result()
 
                 if use_new_centromere:
                     self.internal_ip, self.username = (
@@ -434,13 +483,22 @@ class _CentromereCtx:
 
                 self.dkr_client = _construct_dkr_client(ssh_host="ssh://fake")
 
-            else:
-                self.dkr_client = _construct_dkr_client()
+            elif dkr_fut is not None:
+                self.dkr_client = dkr_fut.result()
         except (Exception, KeyboardInterrupt) as e:
+            # a running ssh-keygen would recreate the key after cleanup
+            if keygen_fut is not None and not keygen_fut.cancel():
+                wait([keygen_fut])
+
             self.cleanup()
             raise e
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    # note: the image names below are cached on first access, so they must not
+    # be read until `__init__` has finalized `workflow_name` and `version`
 
-    @property
+    @cached_property
     def image(self):
         """The image to be registered."""
         if self.account_id is None:
@@ -459,7 +517,7 @@ class _CentromereCtx:
 
         return f"{account_id}_{wf_name}"
 
-    @property
+    @cached_property
     def image_tagged(self):
         """The tagged image to be registered.
 
@@ -471,12 +529,7 @@ class _CentromereCtx:
                 "extracting the package version."
             )
 
-        # From AWS:
-        #   A tag name must be valid ASCII and may contain lowercase and uppercase letters,
-        #   digits, underscores, periods and dashes. A tag name may not start with a period
-        #   or a dash and may contain a maximum of 128 characters.
-
-        match = re.match("^[a-zA-Z0-9_][a-zA-Z0-9._-]{,127}$", self.version)
+        match = docker_image_tag_pat.match(self.version)
         if match is None:
             raise ValueError(
                 f"{self.version} is an invalid version for AWS "
@@ -498,7 +551,7 @@ class _CentromereCtx:
 
         return f"{self.image}:{task_name}-{self.version}"
 
-    @property
+    @cached_property
     def full_image(self):
         """The full image to be registered (without a tag).
 
@@ -591,9 +644,9 @@ class _CentromereCtx:
 
         headers = {"Authorization": f"Bearer {self.token}"}
 
-        ws_id = current_workspace()
+        ws_id = self.account_id
         if ws_id is None or ws_id == "":
-            ws_id = account_id_from_token(retrieve_or_login())
+            ws_id = account_id_from_token(self.token)
 
         response = tinyrequests.post(
             self.latch_check_version_url,
@@ -617,12 +670,14 @@ class _CentromereCtx:
         return self
 
     def cleanup(self):
+        keys: List[Path] = []
         if self.ssh_key_path is not None:
-            self.ssh_key_path.unlink(missing_ok=True)
-            self.ssh_key_path.with_suffix(".pub").unlink(missing_ok=True)
-
+            keys.extend([self.ssh_key_path, self.ssh_key_path.with_suffix(".pub")])
         if self.jump_key_path is not None:
-            self.jump_key_path.unlink(missing_ok=True)
+            keys.append(self.jump_key_path)
+
+        for p in keys:
+            p.unlink(missing_ok=True)
 
         self.downscale_register_deployment()
 
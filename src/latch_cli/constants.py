@@ -66,3 +66,9 @@ class OAuth2Constants:
 oauth2_constants = OAuth2Constants()
 
 docker_image_name_illegal_pat = re.compile(r"[^a-z0-9]+")
+
+# From AWS:
+#   A tag name must be valid ASCII and may contain lowercase and uppercase letters,
+#   digits, underscores, periods and dashes. A tag name may not start with a period
+#   or a dash and may contain a maximum of 128 characters.
+docker_image_tag_pat = re.compile(r"^[a-zA-Z0-9_][a-zA-Z0-9._-]{,127}$")
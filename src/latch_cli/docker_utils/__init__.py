@@ -1,18 +1,27 @@
-from dataclasses import dataclass, field
+import hashlib
+import json
+import os
+import re
+import stat
+from dataclasses import asdict, dataclass, field
 from enum import Enum, auto
-from io import TextIOWrapper
 from pathlib import Path
 from textwrap import dedent
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 import click
 import yaml
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 from latch_cli.utils import WorkflowType
 from latch_cli.workflow_config import LatchWorkflowConfig, get_or_create_workflow_config
 
 
-class DockerCmdBlockOrder(str, Enum):
+class DockerCmdBlockOrder(Enum):
     """Put a command block before or after the primary COPY command."""
 
     precopy = auto()
@@ -26,9 +35,96 @@ class DockerCmdBlock:
     commands: List[str]
     order: DockerCmdBlockOrder
 
-    def write_block(self, f: TextIOWrapper):
-        f.write(f"# {self.comment}\n")
-        f.write("\n".join(self.commands) + "\n\n")
+    def render_block(self) -> str:
+        return "\n".join([f"# {self.comment}", *self.commands, ""])
+
+
+# note: the static parts of the generated Dockerfile are built once at import
+# instead of re-dedenting the same templates for every generated file
+
+_shell_directive = dedent(r"""
+    shell [ \
+        "/usr/bin/env", "bash", \
+        "-o", "errexit", \
+        "-o", "pipefail", \
+        "-o", "nounset", \
+        "-o", "verbose", \
+        "-o", "errtrace", \
+        "-O", "inherit_errexit", \
+        "-O", "shift_verbose", \
+        "-c" \
+    ]
+    """).strip()
+
+_epilogue_commands = (
+    "",
+    "# Latch workflow registration metadata",
+    "# DO NOT CHANGE",
+    "arg tag",
+    "# DO NOT CHANGE",
+    "env FLYTE_INTERNAL_IMAGE $tag",
+    "",
+    "workdir /root",
+)
+
+_apt_install_command = dedent(r"""
+    run apt-get update --yes && \
+        xargs apt-get install --yes \
+            < /opt/latch/system-requirements.txt
+    """).strip()
+
+_rig_install_command = dedent(r"""
+    run \
+        curl \
+            --location \
+            --fail \
+            --remote-name \
+            https://github.com/r-lib/rig/releases/download/latest/rig-linux-latest.tar.gz && \
+        tar \
+            --extract \
+            --gunzip \
+            --file rig-linux-latest.tar.gz \
+            --directory /usr/local/ && \
+        rm rig-linux-latest.tar.gz
+    """).strip()
+
+_mambaforge_install_command = dedent(r"""
+    run apt-get update --yes && \
+        apt-get install --yes curl git && \
+        curl \
+            --location \
+            --fail \
+            --remote-name \
+            https://github.com/conda-forge/miniforge/releases/latest/download/Miniforge3-Linux-x86_64.sh && \
+        `# Docs for -b and -p flags: https://docs.anaconda.com/anaconda/install/silent-mode/#linux-macos` \
+        bash Miniforge3-Linux-x86_64.sh -b -p /opt/conda -u && \
+        rm Miniforge3-Linux-x86_64.sh
+    """).strip()
+
+_conda_env_create_command = dedent(r"""
+    run mamba env create \
+        --file /opt/latch/environment.yaml \
+        --name {env_name}
+    """).strip()
+
+
+# a plain (unquoted, single-word) top-level `name: ...` entry
+_conda_env_name_pat = re.compile(
+    rb"^name:[ \t]*([^\s#'\"|>&*!%@`{}\[\],?:-][^\s#]*)[ \t]*(?:#.*)?\r?$", re.MULTILINE
+)
+
+
+def get_conda_env_name(conda_env: Path) -> str:
+    content = conda_env.read_bytes()
+
+    # only the name is needed so avoid parsing the whole environment when it
+    # can be read off directly
+    matches = _conda_env_name_pat.findall(content)
+    if len(matches) == 1:
+        return matches[0].decode("utf-8")
+
+    env_content = yaml.load(content, Loader=SafeLoader)
+    return env_content.get("name", conda_env.stem)
 
 
 @dataclass
@@ -47,6 +143,14 @@ class DockerfileBuilder:
     pip_requirements: Optional[Path] = None
     direnv: Optional[Path] = None
 
+    # progress output is collected and printed in one go by `generate`
+    messages: List[str] = field(init=False, default_factory=list)
+
+    def report(self, source: Path, phase: str):
+        self.messages.append(
+            " ".join([click.style(f"{source.name}:", bold=True), phase])
+        )
+
     def get_prologue(self):
         if self.wf_type == WorkflowType.snakemake:
             library_name = '"latch[snakemake]"'
@@ -62,19 +166,7 @@ class DockerfileBuilder:
                     "",
                     "workdir /tmp/docker-build/work/",
                     "",
-                    dedent(r"""
-                    shell [ \
-                        "/usr/bin/env", "bash", \
-                        "-o", "errexit", \
-                        "-o", "pipefail", \
-                        "-o", "nounset", \
-                        "-o", "verbose", \
-                        "-o", "errtrace", \
-                        "-O", "inherit_errexit", \
-                        "-O", "shift_verbose", \
-                        "-c" \
-                    ]
-                    """).strip(),
+                    _shell_directive,
                     "env TZ='Etc/UTC'",
                     "env LANG='en_US.UTF-8'",
                     "",
@@ -93,16 +185,7 @@ class DockerfileBuilder:
         self.commands.append(
             DockerCmdBlock(
                 comment="Epilogue",
-                commands=[
-                    "",
-                    "# Latch workflow registration metadata",
-                    "# DO NOT CHANGE",
-                    "arg tag",
-                    "# DO NOT CHANGE",
-                    "env FLYTE_INTERNAL_IMAGE $tag",
-                    "",
-                    "workdir /root",
-                ],
+                commands=list(_epilogue_commands),
                 order=DockerCmdBlockOrder.postcopy,
             )
         )
@@ -111,23 +194,14 @@ class DockerfileBuilder:
         if self.apt_requirements is None:
             return
 
-        click.echo(
-            " ".join([
-                click.style(f"{self.apt_requirements.name}:", bold=True),
-                "System dependencies installation phase",
-            ])
-        )
+        self.report(self.apt_requirements, "System dependencies installation phase")
 
         self.commands.append(
             DockerCmdBlock(
                 comment="Install system dependencies",
                 commands=[
                     f"copy {self.apt_requirements} /opt/latch/system-requirements.txt",
-                    dedent(r"""
-                        run apt-get update --yes && \
-                            xargs apt-get install --yes \
-                                < /opt/latch/system-requirements.txt
-                    """).strip(),
+                    _apt_install_command,
                 ],
                 order=DockerCmdBlockOrder.precopy,
             )
@@ -137,34 +211,14 @@ class DockerfileBuilder:
         if self.r_env is None:
             return
 
-        click.echo(
-            " ".join([
-                click.style(f"{self.r_env.name}:", bold=True),
-                "R dependencies installation phase",
-            ])
-        )
+        self.report(self.r_env, "R dependencies installation phase")
 
         # todo(maximsmol): allow specifying R version
         # todo(maximsmol): somehow promote using pak
         self.commands.extend([
             DockerCmdBlock(
                 comment="Install rig the R installation manager",
-                commands=[
-                    dedent(r"""
-                            run \
-                                curl \
-                                    --location \
-                                    --fail \
-                                    --remote-name \
-                                    https://github.com/r-lib/rig/releases/download/latest/rig-linux-latest.tar.gz && \
-                                tar \
-                                    --extract \
-                                    --gunzip \
-                                    --file rig-linux-latest.tar.gz \
-                                    --directory /usr/local/ && \
-                                rm rig-linux-latest.tar.gz
-                            """).strip()
-                ],
+                commands=[_rig_install_command],
                 order=DockerCmdBlockOrder.precopy,
             ),
             DockerCmdBlock(
@@ -186,36 +240,15 @@ class DockerfileBuilder:
         if self.conda_env is None:
             return
 
-        click.echo(
-            " ".join([
-                click.style(f"{self.conda_env.name}:", bold=True),
-                "Conda dependencies installation phase",
-            ])
-        )
-
-        with self.conda_env.open("rb") as f:
-            env_content = yaml.safe_load(f)
+        self.report(self.conda_env, "Conda dependencies installation phase")
 
-        env_name = env_content.get("name", self.conda_env.stem)
+        env_name = get_conda_env_name(self.conda_env)
 
         # todo(maximsmol): install `curl` and other build deps ahead of time once (or in base image)
         self.commands.extend([
             DockerCmdBlock(
                 comment="Install Mambaforge",
-                commands=[
-                    dedent(r"""
-                    run apt-get update --yes && \
-                        apt-get install --yes curl git && \
-                        curl \
-                            --location \
-                            --fail \
-                            --remote-name \
-                            https://github.com/conda-forge/miniforge/releases/latest/download/Miniforge3-Linux-x86_64.sh && \
-                        `# Docs for -b and -p flags: https://docs.anaconda.com/anaconda/install/silent-mode/#linux-macos` \
-                        bash Miniforge3-Linux-x86_64.sh -b -p /opt/conda -u && \
-                        rm Miniforge3-Linux-x86_64.sh
-                    """).strip()
-                ],
+                commands=[_mambaforge_install_command],
                 order=DockerCmdBlockOrder.precopy,
             ),
             DockerCmdBlock(
@@ -230,11 +263,7 @@ class DockerfileBuilder:
                 comment="Build conda environment",
                 commands=[
                     f"copy {self.conda_env} /opt/latch/environment.yaml",
-                    dedent(rf"""
-                    run mamba env create \
-                        --file /opt/latch/environment.yaml \
-                        --name {env_name}
-                    """).strip(),
+                    _conda_env_create_command.format(env_name=env_name),
                     f"env PATH=/opt/conda/envs/{env_name}/bin:$PATH",
                 ],
                 order=DockerCmdBlockOrder.precopy,
@@ -248,12 +277,7 @@ class DockerfileBuilder:
 
         rel = self.pyproject.resolve().relative_to(self.pkg_root.resolve())
 
-        click.echo(
-            " ".join([
-                click.style(f"{self.pyproject.name}:", bold=True),
-                "Python package installation phase",
-            ])
-        )
+        self.report(self.pyproject, "Python package installation phase")
 
         self.commands.append(
             DockerCmdBlock(
@@ -267,12 +291,7 @@ class DockerfileBuilder:
         if self.pip_requirements is None:
             return
 
-        click.echo(
-            " ".join([
-                click.style(f"{self.pip_requirements.name}:", bold=True),
-                "Python pip dependencies installation phase",
-            ])
-        )
+        self.report(self.pip_requirements, "Python pip dependencies installation phase")
 
         self.commands.append(
             DockerCmdBlock(
@@ -289,20 +308,9 @@ class DockerfileBuilder:
         if self.direnv is None:
             return
 
-        click.echo(
-            " ".join([
-                click.style(f"{self.direnv.name}:", bold=True),
-                "Environment variable setup",
-            ])
-        )
-        envs: list[str] = []
-        for line in self.direnv.read_text().splitlines():
-            line = line.strip()
-
-            if line == "" or line.startswith("#"):
-                continue
-
-            envs.append(f"env {line}")
+        self.report(self.direnv, "Environment variable setup")
+        lines = (x.strip() for x in self.direnv.read_text().splitlines())
+        envs = [f"env {x}" for x in lines if x != "" and not x.startswith("#")]
 
         self.commands.append(
             DockerCmdBlock(
@@ -340,7 +348,8 @@ class DockerfileBuilder:
             )
         )
 
-    def generate(self, *, dest: Optional[Path] = None, overwrite: bool = False):
+    def generate(self, *, dest: Optional[Path] = None, overwrite: bool = False) -> bool:
+        """Write the Dockerfile to `dest`. Returns whether it was written."""
         if dest is None:
             dest = self.pkg_root / "Dockerfile"
 
@@ -351,55 +360,60 @@ class DockerfileBuilder:
                 click.confirm(f"Dockerfile already exists at `{dest}`. Overwrite?")
             )
         ):
-            return
-
-        click.secho("Generating Dockerfile", bold=True)
+            return False
 
-        click.echo(
+        self.messages = [
+            click.style("Generating Dockerfile", bold=True),
             " ".join([
                 click.style("Base image:", fg="bright_blue"),
                 self.config.base_image,
-            ])
-        )
-        click.echo(
+            ]),
             " ".join([
                 click.style("Latch SDK version:", fg="bright_blue"),
                 self.config.latch_version,
-            ])
+            ]),
+            "",
+        ]
+
+        try:
+            self.get_prologue()
+            self.infer_dependencies()
+            self.get_copy_file_commands()
+            self.get_epilogue()
+        finally:
+            # still show how far inference got if one of the steps failed
+            click.echo("\n".join(self.messages))
+
+        blocks: Dict[DockerCmdBlockOrder, List[DockerCmdBlock]] = {
+            order: [] for order in DockerCmdBlockOrder
+        }
+        for command in self.commands:
+            blocks[command.order].append(command)
+
+        dest.write_text(
+            "\n".join(
+                block.render_block()
+                for order in DockerCmdBlockOrder
+                for block in blocks[order]
+            )
         )
-        click.echo()
-
-        self.get_prologue()
-        self.infer_dependencies()
-        self.get_copy_file_commands()
-        self.get_epilogue()
-
-        dockerfile_content: List[str] = []
-
-        for order in [
-            DockerCmdBlockOrder.precopy,
-            DockerCmdBlockOrder.copy,
-            DockerCmdBlockOrder.postcopy,
-        ]:
-            for command in self.commands:
-                if command.order != order:
-                    continue
-
-                dockerfile_content.append(f"# {command.comment}")
-                dockerfile_content.extend(command.commands)
-                dockerfile_content.append("")
-
-        dest.write_text("\n".join(dockerfile_content))
 
         click.secho(f"Successfully generated dockerfile `{dest}`", fg="green")
 
+        return True
+
 
 def generate_dockerignore(
     pkg_root: Path, *, wf_type: WorkflowType, overwrite: bool = False
 ) -> None:
     dest = Path(pkg_root) / ".dockerignore"
-    if dest.exists():
-        if dest.is_dir():
+    try:
+        dest_stat: Optional[os.stat_result] = dest.stat()
+    except FileNotFoundError:
+        dest_stat = None
+
+    if dest_stat is not None:
+        if stat.S_ISDIR(dest_stat.st_mode):
             click.secho(
                 f".dockerignore already exists at `{dest}` and is a directory.",
                 fg="red",
@@ -430,7 +444,25 @@ def get_default_dockerfile(pkg_root: Path, *, wf_type: WorkflowType):
     if not default_dockerfile.exists():
         default_dockerfile = pkg_root / ".latch" / "Dockerfile"
 
-        builder = DockerfileBuilder(pkg_root, config, wf_type)
-        builder.generate(dest=default_dockerfile)
+        # the generated Dockerfile only depends on the workflow config, the
+        # workflow type and the templates in this file, so skip regenerating
+        # it (and asking to overwrite it) when none of those changed
+        m = hashlib.blake2b()
+        m.update(Path(__file__).read_bytes())
+        m.update(json.dumps([asdict(config), wf_type.value]).encode("utf-8"))
+        digest = m.hexdigest()
+
+        digest_path = default_dockerfile.with_name("Dockerfile.hash")
+        try:
+            up_to_date = (
+                default_dockerfile.exists() and digest_path.read_text() == digest
+            )
+        except FileNotFoundError:
+            up_to_date = False
+
+        if not up_to_date:
+            builder = DockerfileBuilder(pkg_root, config, wf_type)
+            if builder.generate(dest=default_dockerfile):
+                digest_path.write_text(digest)
 
     return default_dockerfile
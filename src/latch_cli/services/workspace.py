@@ -19,10 +19,16 @@ def workspace():
 
     selected_marker = "\x1b[3m\x1b[2m (currently selected) \x1b[22m\x1b[23m"
 
+    # the default workspace sorts first, the rest by name (ties keep their
+    # original order)
+    keyed = [
+        ("" if info["default"] else info["name"], i, info)
+        for i, info in enumerate(data.values())
+    ]
+    keyed.sort()
+
     options: List[SelectOption[WSInfo]] = []
-    for _, info in sorted(
-        data.items(), key=lambda x: "" if x[1]["default"] else x[1]["name"]
-    ):
+    for _, _, info in keyed:
         options.append(
             {
                 "display_name": info["name"] if old_id != info["workspace_id"] else info["name"] + selected_marker,
@@ -6,6 +6,11 @@ import click
 import yaml
 from typing_extensions import Annotated
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 from latch.types.directory import LatchDir
 from latch.types.file import LatchFile
 from latch_cli.snakemake.utils import reindent
@@ -44,7 +49,7 @@ def parse_config(
         raise click.exceptions.Exit(1)
 
     try:
-        res: JSONValue = yaml.safe_load(config_path.read_text())
+        res: JSONValue = yaml.load(config_path.read_text(), Loader=SafeLoader)
     except yaml.YAMLError as e:
         click.secho(
             reindent(
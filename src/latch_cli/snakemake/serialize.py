@@ -349,6 +349,7 @@ def generate_snakemake_entrypoint(
 ):
     entrypoint_code_block = textwrap.dedent(r"""
         import os
+        from concurrent.futures import ThreadPoolExecutor
         from pathlib import Path
         import shutil
         import subprocess
@@ -389,6 +390,175 @@ def generate_snakemake_entrypoint(
 
             return f"{si_unit(s.st_size):>7}B {x.name}"
 
+
+        def download_inputs(inputs):
+            def download(x):
+                param, value, dst = x
+                return param, value, Path(value).resolve(), dst
+
+            # downloads are dominated by per-file latency so fetch all inputs
+            # concurrently and only then move them into place
+            workers = int(os.environ.get("LATCH_DOWNLOAD_WORKERS", "8"))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for param, value, local, dst in pool.map(download, inputs):
+                    print(f"Downloaded {param}: {value.remote_path}")
+                    print(f"  {file_name_and_size(local)}")
+
+                    print(f"Moving {param} to {dst}")
+                    check_exists_and_rename(local, dst)
+
+
+        def upload_paths(lp, paths, remote_root: str, *, show_missing_path: bool = False):
+            def upload(x) -> str:
+                local = Path(x)
+                remote = f"latch://{remote_root}/{str(local).removeprefix('/')}"
+
+                if not local.exists():
+                    return f"  {x}: Does not exist" if show_missing_path else "  Does not exist"
+
+                msg = f"  {file_name_and_size(local)} -> {remote}"
+
+                if local.is_file():
+                    lp.upload(local, remote)
+                else:
+                    lp.upload_directory(str(local), remote)
+
+                return f"{msg}\n    Done"
+
+            # uploads are dominated by network latency so run them concurrently,
+            # messages are still printed in order
+            workers = int(os.environ.get("LATCH_UPLOAD_WORKERS", "8"))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for msg in pool.map(upload, paths):
+                    print(msg)
+
+
+        def save_compiled_snakemake(lp, snakemake_args, snakemake_data: str, remote: str):
+            # the compiled script is only kept for debugging and costs a second
+            # snakemake run per task
+            if os.environ.get("LATCH_SKIP_COMPILED_UPLOAD") == "1":
+                return
+
+            compiled = Path("compiled.py")
+            print("Saving compiled Snakemake script")
+            with compiled.open("w") as f:
+                try:
+                    subprocess.run(
+                        [sys.executable, *snakemake_args, "--print-compilation"],
+                        check=True,
+                        env={
+                            **os.environ,
+                            "LATCH_SNAKEMAKE_DATA": snakemake_data,
+                            "LATCH_PRINT_COMPILATION": "1"
+                        },
+                        stdout=f
+                    )
+                except CalledProcessError:
+                    print("  Failed")
+                except Exception:
+                    traceback.print_exc()
+            lp.upload(compiled, remote)
+
+
+        def docker_login(docker_usr: str, secret_name: str):
+            print("\n\n\nLogging into Docker\n")
+            from latch.functions.secrets import get_secret
+            try:
+                docker_pwd = get_secret(secret_name)
+            except ValueError as e:
+                print("Failed to get Docker credentials:", e)
+                sys.exit(1)
+
+            try:
+                subprocess.run(
+                    [
+                        "docker",
+                        "login",
+                        "--username",
+                        docker_usr,
+                        "--password",
+                        docker_pwd,
+                    ],
+                    check=True,
+                )
+            except CalledProcessError as e:
+                print("Failed to login to Docker")
+            except Exception:
+                traceback.print_exc()
+
+
+        def run_snakemake_job(
+            lp,
+            snakemake_args,
+            snakemake_data: str,
+            *,
+            log_files,
+            unused_outputs,
+            benchmark_file,
+            remote_root: str,
+        ):
+            print("\n\n\nRunning snakemake task\n")
+            try:
+                tail = None
+                if len(log_files) == 1:
+                    log = Path(log_files[0])
+                    log.parent.mkdir(parents=True, exist_ok=True)
+                    log.touch()
+
+                    print(f"Tailing the only log file: {log}")
+                    tail = subprocess.Popen(["tail", "--follow", log])
+
+                print("\n\n\n")
+                try:
+                    subprocess.run(
+                        [sys.executable, *snakemake_args],
+                        check=True,
+                        env={
+                            **os.environ,
+                            "LATCH_SNAKEMAKE_DATA": snakemake_data
+                        }
+                    )
+                finally:
+                    if tail is not None:
+                        import signal
+                        tail.send_signal(signal.SIGINT)
+                        try:
+                            tail.wait(1)
+                        except subprocess.TimeoutExpired:
+                            tail.kill()
+
+                        tail.wait()
+                        # -2 is SIGINT
+                        if tail.returncode != -2 and tail.returncode != 0:
+                            print(f"\n\n\n[!] Log file tail died with code {tail.returncode}")
+
+                print("\n\n\nDone\n\n\n")
+            except subprocess.CalledProcessError:
+                sys.exit(1)
+            except Exception as e:
+                print("\n\n\n[!] Failed\n\n\n")
+                raise e
+            finally:
+                print("Uploading logs:")
+                upload_paths(lp, log_files, remote_root)
+
+                print("Uploading intermediate outputs:")
+                upload_paths(lp, unused_outputs, remote_root, show_missing_path=True)
+
+                if benchmark_file is not None:
+                    print("\nUploading benchmark:")
+
+                    local = Path(benchmark_file)
+                    if local.exists():
+                        print(local.read_text())
+
+                        remote = f"latch://{remote_root}/{str(local).removeprefix('/')}"
+                        print(f"  {file_name_and_size(local)} -> {remote}")
+                        lp.upload(local, remote)
+                        print("    Done")
+                    else:
+                        print("  Does not exist")
+
     """).lstrip()
 
     entrypoint_code_block += "\n\n".join(
@@ -418,6 +588,7 @@ def generate_jit_register_code(
     code_block = textwrap.dedent(rf"""
         import json
         import os
+        import py_compile
         import subprocess
         import tempfile
         import textwrap
@@ -1,4 +1,5 @@
 import textwrap
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -20,6 +21,9 @@ def load_snakemake_metadata(pkg_root: Path, metadata_root: Path) -> Optional[Pat
 
 
 # todo(maximsmol): use a stateful writer that keeps track of indent level
+# note: most templates are reindented many times per codegen run, the bound
+# keeps one-off blocks (e.g. ones embedding job data) from piling up
+@lru_cache(maxsize=1024)
 def reindent(x: str, level: int) -> str:
     if len(x) == 0:
         return x
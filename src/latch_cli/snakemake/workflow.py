@@ -1,10 +1,12 @@
 import hashlib
 import importlib
+import itertools
 import json
 import os
 import sys
 import typing
 from dataclasses import dataclass, fields, is_dataclass
+from functools import lru_cache
 from pathlib import Path
 from textwrap import dedent
 from typing import (
@@ -14,6 +16,7 @@ from typing import (
     Iterable,
     List,
     Optional,
+    Set,
     Tuple,
     Type,
     TypeVar,
@@ -109,11 +112,18 @@ class JobOutputInfo:
 def task_fn_placeholder(): ...
 
 
-def variable_name_for_file(file: snakemake.io.AnnotatedString):
-    if file[0] == "/":
-        return f"a_{identifier_suffix_from_str(file)}"
+@lru_cache(maxsize=None)
+def _variable_name_for_path(path: str) -> str:
+    if path[0] == "/":
+        return f"a_{identifier_suffix_from_str(path)}"
+
+    return f"r_{identifier_suffix_from_str(path)}"
 
-    return f"r_{identifier_suffix_from_str(file)}"
+
+def variable_name_for_file(file: snakemake.io.AnnotatedString):
+    # note: the same file is named once per edge it appears on, memoize on the
+    # plain string since annotated strings carry flags
+    return _variable_name_for_path(str(file))
 
 
 def isdir(var: snakemake.io._IOFile) -> bool:
@@ -132,13 +142,26 @@ def snakemake_dag_to_interface(
     docstring: Optional[Docstring] = None,
     local_to_remote_path_mapping: Optional[Dict[str, str]] = None,
 ) -> Tuple[Interface, LiteralMap, List[RemoteFile]]:
+    # note: `dag.file2jobs` scans every rule for each file, index the
+    # producers of every output once instead
+    producer_of: Dict[snakemake.io._IOFile, snakemake.jobs.Job] = {}
+    for job in dag.jobs:
+        for o in job.output:
+            producer_of.setdefault(o, job)
+
     outputs: Dict[str, Union[Type[LatchFile], Type[LatchDir]]] = {}
     for target in dag.targetjobs:
         for desired in target.input:
             param = variable_name_for_file(desired)
 
-            jobs: List[snakemake.jobs.Job] = dag.file2jobs(desired)
-            producer_out: snakemake.io._IOFile = next(x for x in jobs[0].output)
+            producer = producer_of.get(desired)
+            if producer is None:
+                producer = dag.file2jobs(desired)[0]
+
+            producer_out: snakemake.io._IOFile = next(
+                (x for x in producer.output if x == desired),
+                next(x for x in producer.output),
+            )
             if isdir(producer_out):
                 outputs[param] = LatchDir
             else:
@@ -147,18 +170,25 @@ def snakemake_dag_to_interface(
     literals: Dict[str, Literal] = {}
     inputs: Dict[str, Tuple[Type[LatchFile], None]] = {}
     return_files: List[RemoteFile] = []
+    # note: external inputs shared by several jobs only need to be handled once
+    seen_inputs: Set[str] = set()
+    inputs_root = Path("/.snakemake_latch") / "workflows" / wf_name / "inputs"
     for job in dag.jobs:
-        dep_outputs = []
+        dep_outputs = set()
         for dep, dep_files in dag.dependencies[job].items():
             for o in dep.output:
                 if o in dep_files:
-                    dep_outputs.append(o)
+                    dep_outputs.add(o)
             for o in dep.log:
                 if o in dep_files:
-                    dep_outputs.append(o)
+                    dep_outputs.add(o)
 
         for x in job.input:
             if x not in dep_outputs:
+                if str(x) in seen_inputs:
+                    continue
+                seen_inputs.add(str(x))
+
                 param = variable_name_for_file(x)
 
                 if isdir(x):
@@ -166,9 +196,7 @@ def snakemake_dag_to_interface(
                 else:
                     inputs[param] = (LatchFile, None)
 
-                remote_path = (
-                    Path("/.snakemake_latch") / "workflows" / wf_name / "inputs" / x
-                )
+                remote_path = inputs_root / x
                 use_original_remote_path: bool = (
                     local_to_remote_path_mapping is not None
                     and x in local_to_remote_path_mapping
@@ -258,11 +286,30 @@ def binding_from_python(
     return literals_models.Binding(var=var_name, binding=binding_data)
 
 
+_literal_type_cache: Dict[Type, type_models.LiteralType] = {}
+
+
+def _to_literal_type(x: Type) -> type_models.LiteralType:
+    # note: only a handful of distinct types appear across all parameters so
+    # avoid walking the type engine's transformers for each one
+    try:
+        res = _literal_type_cache.get(x)
+    except TypeError:
+        # unhashable annotations, e.g. Annotated with dict metadata
+        return TypeEngine.to_literal_type(x)
+
+    if res is None:
+        res = TypeEngine.to_literal_type(x)
+        _literal_type_cache[x] = res
+
+    return res
+
+
 def transform_type(
     x: Type, description: Optional[str] = None
 ) -> interface_models.Variable:
     return interface_models.Variable(
-        type=TypeEngine.to_literal_type(x), description=description
+        type=_to_literal_type(x), description=description
     )
 
 
@@ -283,23 +330,21 @@ def interface_to_parameters(
     if interface is None or interface.inputs_with_defaults is None:
         return interface_models.ParameterMap({})
 
-    if interface.docstring is None:
-        inputs_vars = transform_types_in_variable_map(interface.inputs)
-    else:
-        inputs_vars = transform_types_in_variable_map(
-            interface.inputs, interface.docstring.input_descriptions
-        )
+    descriptions: Dict[str, str] = {}
+    if interface.docstring is not None:
+        descriptions = interface.docstring.input_descriptions
+
+    ctx = FlyteContextManager.current_context()
 
     params: Dict[str, interface_models.Parameter] = {}
-    for k, v in inputs_vars.items():
-        val, default = interface.inputs_with_defaults[k]
+    for k, (py_type, default) in interface.inputs_with_defaults.items():
+        v = transform_type(py_type, descriptions.get(k, k))
         required = default is None
         default_lv = None
 
-        ctx = FlyteContextManager.current_context()
         if default is not None:
             default_lv = TypeEngine.to_literal(
-                ctx, default, python_type=interface.inputs[k], expected=v.type
+                ctx, default, python_type=py_type, expected=v.type
             )
 
         params[k] = interface_models.Parameter(
@@ -308,6 +353,149 @@ def interface_to_parameters(
     return interface_models.ParameterMap(params)
 
 
+# static parts of the JIT register task body, indented once into the function
+_jit_config_init_code = reindent(
+    r"""
+    overwrite_config = {}
+    overwrite_config['_latchfiles'] = {}
+    local_to_remote_path_mapping = {}
+
+    """,
+    1,
+)
+
+_jit_execution_info_code = reindent(
+    r"""
+
+    dry_run = os.environ.get("LATCH_SNAKEMAKE_DRY_RUN")
+    if dry_run is not None:
+        token = None
+        version = None
+        jit_wf_version = "0.0.0-dry"
+        jit_exec_display_name = "jit-dry-run"
+        account_id = None
+    else:
+        exec_id_hash = hashlib.sha1()
+        token = os.environ["FLYTE_INTERNAL_EXECUTION_ID"]
+        exec_id_hash.update(token.encode("utf-8"))
+        version = exec_id_hash.hexdigest()[:16]
+
+        jit_wf_version = os.environ["FLYTE_INTERNAL_TASK_VERSION"]
+        res = execute(
+            gql.gql('''
+            query executionCreatorsByToken($token: String!) {
+                executionCreatorByToken(token: $token) {
+                    flytedbId
+                    info {
+                        displayName
+                    }
+                    accountInfoByCreatedBy {
+                        id
+                    }
+                }
+            }
+            '''),
+            {"token": token},
+        )["executionCreatorByToken"]
+
+        jit_exec_display_name = res["info"]["displayName"]
+        account_id = res["accountInfoByCreatedBy"]["id"]
+    """,
+    1,
+)
+
+_jit_register_and_launch_code = reindent(
+    r"""
+
+    if dry_run is None:
+        headers = {
+            "Authorization": f"Latch-Execution-Token {token}",
+        }
+
+        temp_dir = tempfile.TemporaryDirectory()
+        with Path(temp_dir.name).resolve() as td:
+            serialize_snakemake(wf, td, image_name, config.dkr_repo)
+
+            protos = _recursive_list(td)
+            reg_resp = register_serialized_pkg(protos, None, version, account_id)
+            _print_reg_resp(reg_resp, image_name)
+
+        wf_spec_remote = f"latch:///.snakemake_latch/workflows/{wf_name}/{version}/spec"
+        spec_dir = Path("spec")
+        for x_dir in spec_dir.iterdir():
+            if not x_dir.is_dir():
+                dst = f"{wf_spec_remote}/{x_dir.name}"
+                print(f"{x_dir} -> {dst}")
+                lp.upload(str(x_dir), dst)
+                print("  done")
+                continue
+
+            for x in x_dir.iterdir():
+                dst = f"{wf_spec_remote}/{x_dir.name}/{x.name}"
+                print(f"{x} -> {dst}")
+                lp.upload(str(x), dst)
+                print("  done")
+
+        class _WorkflowInfoNode(TypedDict):
+            id: str
+
+
+        nodes: Optional[List[_WorkflowInfoNode]] = None
+        while True:
+            time.sleep(1)
+            print("Getting Workflow Data:", end=" ")
+            nodes = execute(
+                gql.gql('''
+                query workflowQuery($name: String, $ownerId: BigInt, $version: String) {
+                    workflowInfos(condition: { name: $name, ownerId: $ownerId, version: $version}) {
+                        nodes {
+                            id
+                        }
+                    }
+                }
+                '''),
+                {"name": wf_name, "version": version, "ownerId": account_id},
+            )["workflowInfos"]["nodes"]
+
+            if not nodes:
+                print("Failed. Trying again.")
+            else:
+                print("Succeeded.")
+                break
+
+
+        if len(nodes) > 1:
+            raise ValueError(
+                "Invariant violated - more than one workflow identified for unique combination"
+                " of {wf_name}, {version}, {account_id}"
+            )
+
+        print(nodes)
+
+        for file in wf.return_files:
+            print(f"Uploading {file.local_path} -> {file.remote_path}")
+            lp.upload(file.local_path, file.remote_path)
+
+        wf_id = nodes[0]["id"]
+        params = gpjson.MessageToDict(wf.literal_map.to_flyte_idl()).get("literals", {})
+
+        print(params)
+
+        _interface_request = {
+            "workflow_id": wf_id,
+            "params": params,
+            "snakemake_jit": True,
+        }
+
+        response = requests.post(urljoin(config.nucleus_url, "/api/create-execution"), headers=headers, json=_interface_request)
+        print(response.json())
+    else:
+        print("Dry run successful. Exiting.")
+    """,
+    1,
+)
+
+
 class JITRegisterWorkflow(WorkflowBase, ClassStorageTaskResolver):
     out_parameter_name = "o0"  # must be "o0"
 
@@ -578,192 +766,74 @@ class JITRegisterWorkflow(WorkflowBase, ClassStorageTaskResolver):
     ):
         task_name = f"{self.name}_task"
 
-        code_block = self.get_fn_interface(fn_name=task_name)
+        parts: List[str] = [self.get_fn_interface(fn_name=task_name)]
 
-        code_block += reindent(
-            rf"""
-            overwrite_config = {{}}
-            overwrite_config['_latchfiles'] = {{}}
-            local_to_remote_path_mapping = {{}}
-
-            """,
-            1,
-        )
+        parts.append(_jit_config_init_code)
 
         for param, t in self.python_interface.inputs.items():
-            code_block += reindent(
-                self.get_param_code(t, param, self.file_metadata, [param]) + "\n",
-                1,
+            parts.append(
+                reindent(
+                    self.get_param_code(t, param, self.file_metadata, [param]) + "\n",
+                    1,
+                )
             )
 
-        code_block += reindent(
-            rf"""
-            image_name = "{image_name}"
-            snakefile = Path("{snakefile_path}")
+        parts.append(
+            reindent(
+                rf"""
+                image_name = "{image_name}"
+                snakefile = Path("{snakefile_path}")
 
-            lp = LatchPersistence()
-            pkg_root = Path.cwd()
-            """,
-            1,
+                lp = LatchPersistence()
+                pkg_root = Path.cwd()
+                """,
+                1,
+            )
         )
 
-        code_block += reindent(
-            r"""
-
-            dry_run = os.environ.get("LATCH_SNAKEMAKE_DRY_RUN")
-            if dry_run is not None:
-                token = None
-                version = None
-                jit_wf_version = "0.0.0-dry"
-                jit_exec_display_name = "jit-dry-run"
-                account_id = None
-            else:
-                exec_id_hash = hashlib.sha1()
-                token = os.environ["FLYTE_INTERNAL_EXECUTION_ID"]
-                exec_id_hash.update(token.encode("utf-8"))
-                version = exec_id_hash.hexdigest()[:16]
-
-                jit_wf_version = os.environ["FLYTE_INTERNAL_TASK_VERSION"]
-                res = execute(
-                    gql.gql('''
-                    query executionCreatorsByToken($token: String!) {
-                        executionCreatorByToken(token: $token) {
-                            flytedbId
-                            info {
-                                displayName
-                            }
-                            accountInfoByCreatedBy {
-                                id
-                            }
-                        }
-                    }
-                    '''),
-                    {"token": token},
-                )["executionCreatorByToken"]
-
-                jit_exec_display_name = res["info"]["displayName"]
-                account_id = res["accountInfoByCreatedBy"]["id"]
-            """,
-            1,
-        )
+        parts.append(_jit_execution_info_code)
 
-        code_block += reindent(
-            rf"""
-            print(f"JIT Workflow Version: {{jit_wf_version}}")
-            print(f"JIT Execution Display Name: {{jit_exec_display_name}}")
-
-            wf = extract_snakemake_workflow(
-                pkg_root,
-                Path("{metadata_path}"),
-                snakefile,
-                jit_wf_version,
-                jit_exec_display_name,
-                local_to_remote_path_mapping,
-                overwrite_config,
-                {self.cache_tasks},
+        parts.append(
+            reindent(
+                rf"""
+                print(f"JIT Workflow Version: {{jit_wf_version}}")
+                print(f"JIT Execution Display Name: {{jit_exec_display_name}}")
+
+                wf = extract_snakemake_workflow(
+                    pkg_root,
+                    Path("{metadata_path}"),
+                    snakefile,
+                    jit_wf_version,
+                    jit_exec_display_name,
+                    local_to_remote_path_mapping,
+                    overwrite_config,
+                    {self.cache_tasks},
+                )
+                wf_name = wf.name
+                generate_snakemake_entrypoint(wf, pkg_root, snakefile, {repr(remote_output_url)}, overwrite_config)
+
+                entrypoint_remote = f"latch:///.snakemake_latch/workflows/{{wf_name}}/{{jit_wf_version}}/{{jit_exec_display_name}}/entrypoint.py"
+                lp.upload("latch_entrypoint.py", entrypoint_remote)
+                print(f"latch_entrypoint.py -> {{entrypoint_remote}}")
+
+                # every task imports the entrypoint, which holds the code of all
+                # tasks, so compile it once here instead of in each task
+                py_compile.compile(
+                    "latch_entrypoint.py",
+                    cfile="latch_entrypoint.pyc",
+                    doraise=True,
+                    invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+                )
+                lp.upload("latch_entrypoint.pyc", f"{{entrypoint_remote}}c")
+                print(f"latch_entrypoint.pyc -> {{entrypoint_remote}}c")
+                """,
+                1,
             )
-            wf_name = wf.name
-            generate_snakemake_entrypoint(wf, pkg_root, snakefile, {repr(remote_output_url)}, overwrite_config)
-
-            entrypoint_remote = f"latch:///.snakemake_latch/workflows/{{wf_name}}/{{jit_wf_version}}/{{jit_exec_display_name}}/entrypoint.py"
-            lp.upload("latch_entrypoint.py", entrypoint_remote)
-            print(f"latch_entrypoint.py -> {{entrypoint_remote}}")
-            """,
-            1,
         )
 
-        code_block += reindent(
-            r"""
-
-            if dry_run is None:
-                headers = {
-                    "Authorization": f"Latch-Execution-Token {token}",
-                }
-
-                temp_dir = tempfile.TemporaryDirectory()
-                with Path(temp_dir.name).resolve() as td:
-                    serialize_snakemake(wf, td, image_name, config.dkr_repo)
-
-                    protos = _recursive_list(td)
-                    reg_resp = register_serialized_pkg(protos, None, version, account_id)
-                    _print_reg_resp(reg_resp, image_name)
-
-                wf_spec_remote = f"latch:///.snakemake_latch/workflows/{wf_name}/{version}/spec"
-                spec_dir = Path("spec")
-                for x_dir in spec_dir.iterdir():
-                    if not x_dir.is_dir():
-                        dst = f"{wf_spec_remote}/{x_dir.name}"
-                        print(f"{x_dir} -> {dst}")
-                        lp.upload(str(x_dir), dst)
-                        print("  done")
-                        continue
-
-                    for x in x_dir.iterdir():
-                        dst = f"{wf_spec_remote}/{x_dir.name}/{x.name}"
-                        print(f"{x} -> {dst}")
-                        lp.upload(str(x), dst)
-                        print("  done")
-
-                class _WorkflowInfoNode(TypedDict):
-                    id: str
-
-
-                nodes: Optional[List[_WorkflowInfoNode]] = None
-                while True:
-                    time.sleep(1)
-                    print("Getting Workflow Data:", end=" ")
-                    nodes = execute(
-                        gql.gql('''
-                        query workflowQuery($name: String, $ownerId: BigInt, $version: String) {
-                            workflowInfos(condition: { name: $name, ownerId: $ownerId, version: $version}) {
-                                nodes {
-                                    id
-                                }
-                            }
-                        }
-                        '''),
-                        {"name": wf_name, "version": version, "ownerId": account_id},
-                    )["workflowInfos"]["nodes"]
-
-                    if not nodes:
-                        print("Failed. Trying again.")
-                    else:
-                        print("Succeeded.")
-                        break
-
-
-                if len(nodes) > 1:
-                    raise ValueError(
-                        "Invariant violated - more than one workflow identified for unique combination"
-                        " of {wf_name}, {version}, {account_id}"
-                    )
-
-                print(nodes)
-
-                for file in wf.return_files:
-                    print(f"Uploading {file.local_path} -> {file.remote_path}")
-                    lp.upload(file.local_path, file.remote_path)
-
-                wf_id = nodes[0]["id"]
-                params = gpjson.MessageToDict(wf.literal_map.to_flyte_idl()).get("literals", {})
-
-                print(params)
-
-                _interface_request = {
-                    "workflow_id": wf_id,
-                    "params": params,
-                    "snakemake_jit": True,
-                }
-
-                response = requests.post(urljoin(config.nucleus_url, "/api/create-execution"), headers=headers, json=_interface_request)
-                print(response.json())
-            else:
-                print("Dry run successful. Exiting.")
-            """,
-            1,
-        )
-        code_block += self.get_fn_return_stmt()
-        return code_block
+        parts.append(_jit_register_and_launch_code)
+        parts.append(self.get_fn_return_stmt())
+        return "".join(parts)
 
 
 class SnakemakeWorkflow(WorkflowBase, ClassStorageTaskResolver):
@@ -794,6 +864,7 @@ class SnakemakeWorkflow(WorkflowBase, ClassStorageTaskResolver):
         self.return_files = return_files
         self._input_parameters = None
         self._dag = dag
+        self._upstream_outputs: Dict[Job, Dict[str, Tuple[str, str]]] = {}
         self._cache_tasks = cache_tasks
         self._docker_metadata = metadata._snakemake_metadata.docker_metadata
         self._use_conda = (
@@ -835,158 +906,153 @@ class SnakemakeWorkflow(WorkflowBase, ClassStorageTaskResolver):
 
         node_map: Dict[str, Node] = {}
 
-        target_files = [x for job in self._dag.targetjobs for x in job.input]
+        target_files = {x for job in self._dag.targetjobs for x in job.input}
+
+        # every dependency is visited before its dependents, so the outputs of
+        # upstream jobs are always recorded here by the time they are needed
+        job_outputs: Dict[Job, Dict[SnakemakeInputVal, JobOutputInfo]] = {}
+        # every job of a rule shares its script
+        scripts: Dict[str, bytes] = {}
 
         node_id = 0
-        for layer in self._dag.toposorted():
-            for job in layer:
-                assert isinstance(job, snakemake.jobs.Job)
-                is_target = False
+        for job in itertools.chain.from_iterable(self._dag.toposorted()):
+            assert isinstance(job, snakemake.jobs.Job)
+            is_target = False
 
-                if job in self._dag.targetjobs:
-                    continue
+            if job in self._dag.targetjobs:
+                continue
 
-                target_file_for_output_param: Dict[str, str] = {}
-                target_file_for_input_param: Dict[str, str] = {}
-
-                python_outputs: Dict[str, Union[Type[LatchFile], Type[LatchDir]]] = {}
-                for x in job.output:
-                    assert isinstance(x, SnakemakeInputVal)
-
-                    if x in target_files:
-                        is_target = True
-                    param = variable_name_for_file(x)
-                    target_file_for_output_param[param] = x
-
-                    if isdir(x):
-                        python_outputs[param] = LatchDir
-                    else:
-                        python_outputs[param] = LatchFile
-
-                for x in job.log:
-                    assert isinstance(x, SnakemakeInputVal)
-
-                    if x in target_files:
-                        is_target = True
-                    param = variable_name_for_file(x)
-                    target_file_for_output_param[param] = x
-
-                    if isdir(x):
-                        python_outputs[param] = LatchDir
-                    else:
-                        python_outputs[param] = LatchFile
-
-                dep_outputs: Dict[SnakemakeInputVal, JobOutputInfo] = {}
-                for dep, dep_files in self._dag.dependencies[job].items():
-                    for o in dep.output:
-                        if o in dep_files:
-                            assert isinstance(o, SnakemakeInputVal)
-
-                            dep_outputs[o] = JobOutputInfo(
-                                jobid=dep.jobid,
-                                output_param_name=variable_name_for_file(o),
-                                type_=LatchDir if isdir(o) else LatchFile,
-                            )
-
-                    for o in dep.log:
-                        if o in dep_files:
-                            assert isinstance(o, SnakemakeInputVal)
-
-                            dep_outputs[o] = JobOutputInfo(
-                                jobid=dep.jobid,
-                                output_param_name=variable_name_for_file(o),
-                                type_=LatchDir if isdir(o) else LatchFile,
-                            )
-
-                python_inputs: Dict[str, Union[Type[LatchFile], Type[LatchDir]]] = {}
-                promise_map: Dict[str, JobOutputInfo] = {}
-                for x in job.input:
-                    param = variable_name_for_file(x)
-                    target_file_for_input_param[param] = x
-
-                    dep_out = dep_outputs.get(x)
-
-                    if isdir(x):
-                        python_inputs[param] = LatchDir
-                    else:
-                        python_inputs[param] = LatchFile
-
-                    if dep_out is not None:
-                        python_inputs[param] = dep_out.type_
-                        promise_map[param] = dep_out
-
-                interface = Interface(python_inputs, python_outputs, docstring=None)
-                task = SnakemakeJobTask(
-                    wf=self,
-                    job=job,
-                    inputs=python_inputs,
-                    outputs=python_outputs,
-                    target_file_for_input_param=target_file_for_input_param,
-                    target_file_for_output_param=target_file_for_output_param,
-                    is_target=is_target,
-                    interface=interface,
-                )
+            deps = self._dag.dependencies[job]
 
-                if getattr(task, "_metadata") is None:
-                    task._metadata = TaskMetadata()
+            target_file_for_output_param: Dict[str, str] = {}
+            target_file_for_input_param: Dict[str, str] = {}
 
-                if self._cache_tasks:
-                    task._metadata.cache = True
-                    task._metadata.cache_serialize = True
+            python_outputs: Dict[str, Union[Type[LatchFile], Type[LatchDir]]] = {}
+            output_infos: Dict[SnakemakeInputVal, JobOutputInfo] = {}
+            for x in itertools.chain(job.output, job.log):
+                assert isinstance(x, SnakemakeInputVal)
 
-                    hash = hashlib.new("sha256")
-                    hash.update(job.properties().encode())
-                    if job.is_script:
-                        hash.update(Path(job.rule.script).read_bytes())
+                if x in target_files:
+                    is_target = True
+                param = variable_name_for_file(x)
+                target_file_for_output_param[param] = x
 
-                    task._metadata.cache_version = hash.hexdigest()
+                if isdir(x):
+                    python_outputs[param] = LatchDir
+                else:
+                    python_outputs[param] = LatchFile
 
-                self.snakemake_tasks.append(task)
+                output_infos[x] = JobOutputInfo(
+                    jobid=job.jobid,
+                    output_param_name=param,
+                    type_=python_outputs[param],
+                )
 
-                typed_interface = transform_interface_to_typed_interface(interface)
-                assert typed_interface is not None
+            job_outputs[job] = output_infos
 
-                bindings: List[literals_models.Binding] = []
-                for k in interface.inputs:
-                    var = typed_interface.inputs[k]
-                    if var.description in promise_map:
-                        job_output_info = promise_map[var.description]
-                        promise_to_bind = Promise(
-                            var=k,
-                            val=NodeOutput(
-                                node=node_map[job_output_info.jobid],
-                                var=job_output_info.output_param_name,
-                            ),
-                        )
-                    else:
-                        promise_to_bind = Promise(
-                            var=k,
-                            val=NodeOutput(node=GLOBAL_START_NODE, var=k),
-                        )
-                    bindings.append(
-                        binding_from_python(
-                            var_name=k,
-                            expected_literal_type=var.type,
-                            t_value=promise_to_bind,
-                            t_value_type=interface.inputs[k],
-                        )
-                    )
+            dep_outputs: Dict[SnakemakeInputVal, JobOutputInfo] = {}
+            for dep, dep_files in deps.items():
+                dep_infos = job_outputs.get(dep, {})
+                for o in dep_files:
+                    info = dep_infos.get(o)
+                    if info is not None:
+                        dep_outputs[o] = info
+
+            python_inputs: Dict[str, Union[Type[LatchFile], Type[LatchDir]]] = {}
+            promise_map: Dict[str, JobOutputInfo] = {}
+            for x in job.input:
+                param = variable_name_for_file(x)
+                target_file_for_input_param[param] = x
 
-                upstream_nodes = []
-                for x in self._dag.dependencies[job].keys():
-                    if x.jobid in node_map:
-                        upstream_nodes.append(node_map[x.jobid])
-
-                node = Node(
-                    id=f"n{node_id}",
-                    metadata=task.construct_node_metadata(),
-                    bindings=sorted(bindings, key=lambda b: b.var),
-                    upstream_nodes=upstream_nodes,
-                    flyte_entity=task,
+                dep_out = dep_outputs.get(x)
+
+                if isdir(x):
+                    python_inputs[param] = LatchDir
+                else:
+                    python_inputs[param] = LatchFile
+
+                if dep_out is not None:
+                    python_inputs[param] = dep_out.type_
+                    promise_map[param] = dep_out
+
+            interface = Interface(python_inputs, python_outputs, docstring=None)
+            task = SnakemakeJobTask(
+                wf=self,
+                job=job,
+                inputs=python_inputs,
+                outputs=python_outputs,
+                target_file_for_input_param=target_file_for_input_param,
+                target_file_for_output_param=target_file_for_output_param,
+                is_target=is_target,
+                interface=interface,
+            )
+
+            if getattr(task, "_metadata") is None:
+                task._metadata = TaskMetadata()
+
+            if self._cache_tasks:
+                task._metadata.cache = True
+                task._metadata.cache_serialize = True
+
+                hash = hashlib.new("sha256")
+                hash.update(job.properties().encode())
+                if job.is_script:
+                    script = scripts.get(job.rule.script)
+                    if script is None:
+                        script = Path(job.rule.script).read_bytes()
+                        scripts[job.rule.script] = script
+
+                    hash.update(script)
+
+                task._metadata.cache_version = hash.hexdigest()
+
+            self.snakemake_tasks.append(task)
+
+            # note: the task already transformed its interface on construction
+            typed_interface = task.interface
+            assert typed_interface is not None
+
+            bindings: List[literals_models.Binding] = []
+            for k in sorted(interface.inputs):
+                var = typed_interface.inputs[k]
+                if var.description in promise_map:
+                    job_output_info = promise_map[var.description]
+                    promise_to_bind = Promise(
+                        var=k,
+                        val=NodeOutput(
+                            node=node_map[job_output_info.jobid],
+                            var=job_output_info.output_param_name,
+                        ),
+                    )
+                else:
+                    promise_to_bind = Promise(
+                        var=k,
+                        val=NodeOutput(node=GLOBAL_START_NODE, var=k),
+                    )
+                bindings.append(
+                    binding_from_python(
+                        var_name=k,
+                        expected_literal_type=var.type,
+                        t_value=promise_to_bind,
+                        t_value_type=interface.inputs[k],
+                    )
                 )
-                node_map[job.jobid] = node
 
-                node_id += 1
+            upstream_nodes = []
+            for x in deps.keys():
+                if x.jobid in node_map:
+                    upstream_nodes.append(node_map[x.jobid])
+
+            node = Node(
+                id=f"n{node_id}",
+                metadata=task.construct_node_metadata(),
+                bindings=bindings,
+                upstream_nodes=upstream_nodes,
+                flyte_entity=task,
+            )
+            node_map[job.jobid] = node
+
+            node_id += 1
 
         bindings: Dict[str, literals_models.Binding] = {}
         for target in self._dag.targetjobs:
@@ -1017,12 +1083,22 @@ class SnakemakeWorkflow(WorkflowBase, ClassStorageTaskResolver):
         self._output_bindings = list(bindings.values())
 
     def find_upstream_node_matching_file(self, job: snakemake.jobs.Job, out_file: str):
-        for depen, files in self._dag.dependencies[job].items():
-            for f in files:
-                if f == out_file:
-                    return depen.jobid, variable_name_for_file(f)
+        upstream = self._upstream_outputs.get(job)
+        if upstream is None:
+            upstream = {}
+            for depen, files in self._dag.dependencies[job].items():
+                for f in files:
+                    upstream.setdefault(f, (depen.jobid, variable_name_for_file(f)))
+
+            self._upstream_outputs[job] = upstream
+
+        res = upstream.get(out_file)
+        if res is None:
+            raise RuntimeError(
+                f"could not find upstream node for output file: {out_file}"
+            )
 
-        raise RuntimeError(f"could not find upstream node for output file: {out_file}")
+        return res
 
     def execute(self, **kwargs):
         return exception_scopes.user_entry_point(self._workflow_function)(**kwargs)
@@ -1092,7 +1168,7 @@ def build_jit_register_wrapper(
     task._interface = typed_interface
 
     task_bindings: List[literals_models.Binding] = []
-    for k in python_interface.inputs:
+    for k in sorted(python_interface.inputs):
         var = typed_interface.inputs[k]
         promise_to_bind = Promise(
             var=k,
@@ -1109,7 +1185,7 @@ def build_jit_register_wrapper(
     task_node = Node(
         id="n0",
         metadata=task.construct_node_metadata(),
-        bindings=sorted(task_bindings, key=lambda b: b.var),
+        bindings=task_bindings,
         upstream_nodes=[],
         flyte_entity=task,
     )
@@ -1139,10 +1215,25 @@ class AnnotatedStrJson(TypedDict):
 MaybeAnnotatedStrJson: TypeAlias = Union[str, AnnotatedStrJson]
 
 
+_annotated_str_types = (snakemake.io.AnnotatedString, snakemake.io._IOFile)
+_exact_annotated_str_types = frozenset(_annotated_str_types)
+
+
+def _is_annotated_str(x: object) -> bool:
+    # note: exact type checks resolve almost every value without walking the
+    # mro, subclasses still fall through to isinstance
+    t = type(x)
+    if t in _exact_annotated_str_types:
+        return True
+    if t is str:
+        return False
+    return isinstance(x, _annotated_str_types)
+
+
 def annotated_str_to_json(
     x: Union[str, snakemake.io._IOFile, snakemake.io.AnnotatedString]
 ) -> MaybeAnnotatedStrJson:
-    if not isinstance(x, (snakemake.io.AnnotatedString, snakemake.io._IOFile)):
+    if not _is_annotated_str(x):
         return x
 
     flags = dict(x.flags.items())
@@ -1166,22 +1257,17 @@ class NamedListJson(TypedDict):
 
 def named_list_to_json(xs: snakemake.io.Namedlist) -> NamedListJson:
     named: Dict[str, IONamedListItem] = {}
+    named_values = set()
     for k, vs in xs.items():
         if not isinstance(vs, list):
-            named[k] = annotated_str_to_json(vs)
+            obj = annotated_str_to_json(vs)
+            named[k] = obj
+            named_values.add(obj["value"] if isinstance(obj, dict) else obj)
             continue
 
-        named[k] = [annotated_str_to_json(v) for v in vs]
-
-    named_values = set()
-    for vs in named.values():
-        if not isinstance(vs, list):
-            vs = [vs]
-
-        for v in vs:
-            if isinstance(v, dict):
-                v = v["value"]
-            named_values.add(v)
+        objs = [annotated_str_to_json(v) for v in vs]
+        named[k] = objs
+        named_values.update(x["value"] if isinstance(x, dict) else x for x in objs)
 
     unnamed: List[IONamedListItem] = []
     for vs in xs:
@@ -1189,19 +1275,41 @@ def named_list_to_json(xs: snakemake.io.Namedlist) -> NamedListJson:
             vs = [vs]
 
         for v in vs:
-            obj = annotated_str_to_json(v)
-
-            rendered = obj
-            if isinstance(rendered, dict):
-                rendered = rendered["value"]
+            # only render values that are not already covered by a keyword
+            rendered = str(v) if _is_annotated_str(v) else v
             if rendered in named_values:
                 continue
 
-            unnamed.append(obj)
+            unnamed.append(annotated_str_to_json(v))
 
     return {"positional": unnamed, "keyword": named}
 
 
+_job_task_outputs_template = dedent("""\
+    class Res{name}(NamedTuple):
+    {output_fields}
+
+    """)
+
+_job_task_fn_template = dedent("""\
+    task = custom_task(cpu=-1, memory=-1) # these limits are a lie and are ignored when generating the task spec
+    @task(cache=True)
+    def {name}(
+    {params}
+    ) -> {outputs}
+    """)
+
+
+_job_task_return_template = dedent("""\
+        print("Uploading results:")
+    {print_outs}
+
+        return Res{name}(
+    {results}
+        )
+    """)
+
+
 class SnakemakeJobTask(PythonAutoContainerTask[Pod]):
     def __init__(
         self,
@@ -1224,6 +1332,11 @@ class SnakemakeJobTask(PythonAutoContainerTask[Pod]):
         self._target_file_for_input_param = target_file_for_input_param
         self._target_file_for_output_param = target_file_for_output_param
 
+        # inputs and outputs are fixed at this point so the rendered
+        # signature and return statement never change
+        self._fn_interface: Optional[str] = None
+        self._fn_return_stmts: Dict[Optional[str], str] = {}
+
         self._task_function = task_fn_placeholder
 
         limits = self.job.resources
@@ -1292,13 +1405,19 @@ class SnakemakeJobTask(PythonAutoContainerTask[Pod]):
             if container.name == self.task_config.primary_container_name:
                 container.image = sdk_default_container.image
                 # Spawn entrypoint as child process so it can receive signals
+                entrypoint_remote = f"latch:///.snakemake_latch/workflows/{self.wf.name}/{self.wf.jit_wf_version}/{self.wf.jit_exec_display_name}/entrypoint.py"
+                # the bytecode is only an optimization, fall back to compiling
+                # the entrypoint if it cannot be downloaded
+                entrypoint_pyc = (
+                    f"__pycache__/latch_entrypoint.{sys.implementation.cache_tag}.pyc"
+                )
                 container.command = [
                     "/bin/bash",
                     "-c",
                     (
-                        "exec 3>&1 4>&2 && latch cp"
-                        f' "latch:///.snakemake_latch/workflows/{self.wf.name}/{self.wf.jit_wf_version}/{self.wf.jit_exec_display_name}/entrypoint.py"'
-                        " latch_entrypoint.py && ("
+                        f'exec 3>&1 4>&2 && latch cp "{entrypoint_remote}"'
+                        " latch_entrypoint.py && mkdir -p __pycache__ && ( latch cp"
+                        f' "{entrypoint_remote}c" {entrypoint_pyc} || true ) && ('
                         f" {' '.join(sdk_default_container.args)} 1>&3 2>&4 )"
                     ),
                 ]
@@ -1344,57 +1463,38 @@ class SnakemakeJobTask(PythonAutoContainerTask[Pod]):
         return {_PRIMARY_CONTAINER_NAME_FIELD: self.task_config.primary_container_name}
 
     def get_fn_interface(self):
+        if self._fn_interface is not None:
+            return self._fn_interface
+
         res = ""
 
         params_str = ",\n".join(
-            reindent(
-                rf"""
-                {param}: {t.__name__}
-                """,
-                1,
-            ).rstrip()
-            for param, t in self._python_inputs.items()
+            f"    {param}: {t.__name__}" for param, t in self._python_inputs.items()
         )
 
         outputs_str = "None:"
         if len(self._python_outputs.items()) > 0:
             output_fields = "\n".join(
-                reindent(
-                    rf"""
-                    {param}: {t.__name__}
-                    """,
-                    1,
-                ).rstrip()
+                f"    {param}: {t.__name__}"
                 for param, t in self._python_outputs.items()
             )
 
-            res += reindent(
-                rf"""
-                class Res{self.name}(NamedTuple):
-                __output_fields__
-
-                """,
-                0,
-            ).replace("__output_fields__", output_fields)
+            res += _job_task_outputs_template.format(
+                name=self.name, output_fields=output_fields
+            )
             outputs_str = f"Res{self.name}:"
 
-        res += (
-            reindent(
-                rf"""
-                task = custom_task(cpu=-1, memory=-1) # these limits are a lie and are ignored when generating the task spec
-                @task(cache=True)
-                def {self.name}(
-                __params__
-                ) -> __outputs__
-                """,
-                0,
-            )
-            .replace("__params__", params_str)
-            .replace("__outputs__", outputs_str)
+        res += _job_task_fn_template.format(
+            name=self.name, params=params_str, outputs=outputs_str
         )
+        self._fn_interface = res
         return res
 
     def get_fn_return_stmt(self, remote_output_url: Optional[str] = None):
+        res = self._fn_return_stmts.get(remote_output_url)
+        if res is not None:
+            return res
+
         print_outs: List[str] = []
         results: List[str] = []
         for out_name, out_type in self._python_outputs.items():
@@ -1413,41 +1513,21 @@ class SnakemakeJobTask(PythonAutoContainerTask[Pod]):
                 )
 
             results.append(
-                reindent(
-                    rf"""
-                    {out_name}={out_type.__name__}({repr(target_path)}, "latch://{remote_path}")
-                    """,
-                    2,
-                ).rstrip()
+                f"        {out_name}={out_type.__name__}({repr(target_path)},"
+                f' "latch://{remote_path}")'
             )
-
             print_outs.append(
-                reindent(
-                    rf"""
-                    print(f'  {out_name}={{file_name_and_size(Path("{target_path}"))}} -> latch://{remote_path}')
-                    """,
-                    1,
-                )
+                f"    print(f'  {out_name}={{file_name_and_size(Path(\"{target_path}\"))}}"
+                f" -> latch://{remote_path}')\n"
             )
 
-        print_out_str = "\n".join(print_outs)
-        return_str = ",\n".join(results)
-
-        return (
-            reindent(
-                rf"""
-                    print("Uploading results:")
-                __print_out__
-
-                    return Res{self.name}(
-                __return_str__
-                    )
-            """,
-                0,
-            )
-            .replace("__print_out__", print_out_str)
-            .replace("__return_str__", return_str)
+        res = _job_task_return_template.format(
+            name=self.name,
+            print_outs="\n".join(print_outs),
+            results=",\n".join(results),
         )
+        self._fn_return_stmts[remote_output_url] = res
+        return res
 
     def get_fn_code(
         self,
@@ -1455,34 +1535,20 @@ class SnakemakeJobTask(PythonAutoContainerTask[Pod]):
         remote_output_url: Optional[str] = None,
         overwrite_config: Optional[Dict[str, str]] = None,
     ):
-        code_block = self.get_fn_interface()
+        parts: List[str] = [self.get_fn_interface()]
 
+        downloads: List[str] = []
         for param, t in self._python_inputs.items():
             if not issubclass(t, (LatchFile, LatchDir)):
                 continue
 
-            code_block += reindent(
-                rf"""
-                {param}_dst_p = Path("{self._target_file_for_input_param[param]}")
-
-                print(f"Downloading {param}: {{{param}.remote_path}}")
-                {param}_p = Path({param}).resolve()
-                print(f"  {{file_name_and_size({param}_p)}}")
+            dst = str(self._target_file_for_input_param[param])
+            downloads.append(f"        ({param!r}, {param}, Path({dst!r})),\n")
 
-                """,
-                1,
-            )
-
-            code_block += reindent(
-                rf"""
-                print(f"Moving {param} to {{{param}_dst_p}}")
-                check_exists_and_rename(
-                    {param}_p,
-                    {param}_dst_p
-                )
-                """,
-                1,
-            )
+        if len(downloads) > 0:
+            parts.append("    download_inputs([\n")
+            parts.extend(downloads)
+            parts.append("    ])\n\n")
 
         jobs: List[Job] = [self.job]
         if isinstance(self.job, GroupJob):
@@ -1573,175 +1639,59 @@ class SnakemakeJobTask(PythonAutoContainerTask[Pod]):
             else []
         )
 
-        code_block += reindent(
-            rf"""
-            lp = LatchPersistence()
-            compiled = Path("compiled.py")
-            print("Saving compiled Snakemake script")
-            with compiled.open("w") as f:
-                try:
-                    subprocess.run(
-                        [sys.executable,{','.join(repr(x) for x in [*snakemake_args, "--print-compilation"])}],
-                        check=True,
-                        env={{
-                            **os.environ,
-                            "LATCH_SNAKEMAKE_DATA": {repr(json.dumps(snakemake_data))},
-                            "LATCH_PRINT_COMPILATION": "1"
-                        }},
-                        stdout=f
-                    )
-                except CalledProcessError:
-                    print("  Failed")
-                except Exception:
-                    traceback.print_exc()
-            lp.upload(compiled, "latch:///.snakemake_latch/workflows/{self.wf.name}/compiled_tasks/{self.name}.py")
-            """,
-            1,
+        parts.append(
+            reindent(
+                rf"""
+                lp = LatchPersistence()
+                snakemake_args = {repr([str(x) for x in snakemake_args])}
+                snakemake_data = {repr(json.dumps(snakemake_data))}
+                save_compiled_snakemake(
+                    lp,
+                    snakemake_args,
+                    snakemake_data,
+                    "latch:///.snakemake_latch/workflows/{self.wf.name}/compiled_tasks/{self.name}.py",
+                )
+                """,
+                1,
+            )
         )
 
         if (
             self.wf._docker_metadata is not None
             and self.job.container_img_url is not None
         ):
-            code_block += reindent(
-                rf"""
+            parts.append(
+                reindent(
+                    rf"""
+                    docker_login(
+                        {repr(self.wf._docker_metadata.username)},
+                        {repr(self.wf._docker_metadata.secret_name)},
+                    )
+                    """,
+                    1,
+                )
+            )
 
-                print("\n\n\nLogging into Docker\n")
-                from latch.functions.secrets import get_secret
-                docker_usr = "{self.wf._docker_metadata.username}"
-                try:
-                    docker_pwd = get_secret("{self.wf._docker_metadata.secret_name}")
-                except ValueError as e:
-                    print("Failed to get Docker credentials:", e)
-                    sys.exit(1)
+        parts.append(
+            reindent(
+                rf"""
+                run_snakemake_job(
+                    lp,
+                    snakemake_args,
+                    snakemake_data,
+                    log_files={repr(log_files)},
+                    unused_outputs={repr(unused_outputs)},
+                    benchmark_file={repr(self.job.benchmark)},
+                    remote_root={repr(str(remote_path))},
+                )
 
-                try:
-                    subprocess.run(
-                        [
-                            "docker",
-                            "login",
-                            "--username",
-                            docker_usr,
-                            "--password",
-                            docker_pwd,
-                        ],
-                        check=True,
-                    )
-                except CalledProcessError as e:
-                    print("Failed to login to Docker")
-                except Exception:
-                    traceback.print_exc()
                 """,
                 1,
             )
-
-        code_block += reindent(
-            rf"""
-
-            print("\n\n\nRunning snakemake task\n")
-            try:
-                log_files = {repr(log_files)}
-                try:
-                    tail = None
-                    if len(log_files) == 1:
-                        log = Path(log_files[0])
-                        log.parent.mkdir(parents=True, exist_ok=True)
-                        log.touch()
-
-                        print(f"Tailing the only log file: {{log}}")
-                        tail = subprocess.Popen(["tail", "--follow", log])
-
-                    print("\n\n\n")
-                    try:
-                        subprocess.run(
-                            [sys.executable,{','.join(repr(x) for x in snakemake_args)}],
-                            check=True,
-                            env={{
-                                **os.environ,
-                                "LATCH_SNAKEMAKE_DATA": {repr(json.dumps(snakemake_data))}
-                            }}
-                        )
-                    finally:
-                        if tail is not None:
-                            import signal
-                            tail.send_signal(signal.SIGINT)
-                            try:
-                                tail.wait(1)
-                            except subprocess.TimeoutExpired:
-                                tail.kill()
-
-                            tail.wait()
-                            # -2 is SIGINT
-                            if tail.returncode != -2 and tail.returncode != 0:
-                                print(f"\n\n\n[!] Log file tail died with code {{tail.returncode}}")
-
-                    print("\n\n\nDone\n\n\n")
-                except subprocess.CalledProcessError:
-                    sys.exit(1)
-                except Exception as e:
-                    print("\n\n\n[!] Failed\n\n\n")
-                    raise e
-                finally:
-                    print("Uploading logs:")
-                    for x in log_files:
-                        local = Path(x)
-                        remote = f"latch://{remote_path}/{{str(local).removeprefix('/')}}"
-
-                        if not local.exists():
-                            print("  Does not exist")
-                            continue
-
-                        print(f"  {{file_name_and_size(local)}} -> {{remote}}")
-
-                        if local.is_file():
-                            lp.upload(local, remote)
-                        else:
-                            lp.upload_directory(str(local), remote)
-
-                        print("    Done")
-
-                    print("Uploading intermediate outputs:")
-                    for x in {repr(unused_outputs)}:
-                        local = Path(x)
-                        remote = f"latch://{remote_path}/{{str(local).removeprefix('/')}}"
-
-                        if not local.exists():
-                            print(f"  {{x}}: Does not exist")
-                            continue
-
-                        print(f"  {{file_name_and_size(local)}} -> {{remote}}")
-
-                        if local.is_file():
-                            lp.upload(local, remote)
-                        else:
-                            lp.upload_directory(str(local), remote)
-
-                        print("    Done")
-
-                    benchmark_file = {repr(self.job.benchmark)}
-                    if benchmark_file is not None:
-                        print("\nUploading benchmark:")
-
-                        local = Path(benchmark_file)
-                        if local.exists():
-                            print(local.read_text())
-
-                            remote = f"latch://{remote_path}/{{str(local).removeprefix('/')}}"
-                            print(f"  {{file_name_and_size(local)}} -> {{remote}}")
-                            lp.upload(local, remote)
-                            print("    Done")
-                        else:
-                            print("  Does not exist")
-
-            finally:
-                ignored_paths = {{".cache", ".snakemake/conda"}}
-                ignored_names = {{".git", ".latch", "__pycache__"}}
-            """,
-            1,
         )
 
-        code_block += self.get_fn_return_stmt(remote_output_url=remote_output_url)
-        return code_block
+        parts.append(self.get_fn_return_stmt(remote_output_url=remote_output_url))
+        return "".join(parts)
 
     @property
     def dockerfile_path(self) -> Path:
@@ -1755,6 +1705,12 @@ class SnakemakeJobTask(PythonAutoContainerTask[Pod]):
         return exception_scopes.user_entry_point(self._task_function)(**kwargs)
 
 
+@lru_cache(maxsize=16)
+def _import_task_module(name: str):
+    # note: resolvers are asked for every task in the same few modules
+    return importlib.import_module(name)
+
+
 class SnakemakeJobTaskResolver(DefaultTaskResolver):
     @property
     def location(self) -> str:
@@ -1768,7 +1724,7 @@ class SnakemakeJobTaskResolver(DefaultTaskResolver):
     def load_task(self, loader_args: List[str]) -> PythonAutoContainerTask:
         _, task_module, _, task_name, *_ = loader_args
 
-        task_module = importlib.import_module(task_module)
+        task_module = _import_task_module(task_module)
 
         task_def = getattr(task_module, task_name)
         return task_def
@@ -1787,7 +1743,7 @@ class JITRegisterWorkflowResolver(DefaultTaskResolver):
     def load_task(self, loader_args: List[str]) -> PythonAutoContainerTask:
         _, task_module, _, task_name, *_ = loader_args
 
-        task_module = importlib.import_module(task_module)
+        task_module = _import_task_module(task_module)
 
         task_def = getattr(task_module, task_name)
         return task_def
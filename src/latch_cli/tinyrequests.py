@@ -1,8 +1,11 @@
 import json as _json
+import os
+import select
+import threading
 import time
 from http import HTTPStatus
-from http.client import HTTPException, HTTPResponse, HTTPSConnection
-from typing import Any, Dict, Optional
+from http.client import HTTPException, HTTPResponse, HTTPSConnection, RemoteDisconnected
+from typing import Any, Dict, Optional, Tuple
 from urllib.parse import urlparse, urlunparse
 
 
@@ -67,6 +70,43 @@ class TinyResponse:
             self._resp.close()
 
 
+_local = threading.local()
+
+
+def _conn_pool() -> Dict[Tuple[str, int], HTTPSConnection]:
+    # `HTTPSConnection`s are not thread safe so keep one pool per thread
+    pool = getattr(_local, "pool", None)
+    if pool is None:
+        pool = {}
+        _local.pool = pool
+
+    return pool
+
+
+# requests that can safely be repeated if the server may have already seen them
+_idempotent_methods = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+def _is_dropped(conn: HTTPSConnection) -> bool:
+    # an idle keep-alive connection only becomes readable once the server has
+    # closed it
+    if conn.sock is None:
+        return True
+
+    readable, _, _ = select.select([conn.sock], [], [], 0)
+    return len(readable) > 0
+
+
+def _reset_conn_pools():
+    global _local
+    _local = threading.local()
+
+
+# forked children must not share the parent's sockets
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_conn_pools)
+
+
 def _req(
     method: str,
     url: str,
@@ -89,11 +129,24 @@ def _req(
         headers["Content-Type"] = "application/json"
 
     port = parts.port if parts.port is not None else 443
+    key = (parts.hostname, port)
 
-    retries = 3
-    while True:
-        conn = HTTPSConnection(parts.hostname, port, timeout=90)
+    pool = _conn_pool()
 
+    while True:
+        # streamed responses hold on to their connection, so never pool them
+        conn = None if stream else pool.pop(key, None)
+        if conn is not None and _is_dropped(conn):
+            conn.close()
+            conn = None
+
+        reused = conn is not None
+        if conn is None:
+            conn = HTTPSConnection(parts.hostname, port, timeout=90)
+
+        # a stale keep-alive connection is retried if the request could not be
+        # written, or, for idempotent methods only, if the server hung up
+        # before responding (it may have already processed the request)
         try:
             conn.request(
                 method,
@@ -101,14 +154,35 @@ def _req(
                 headers=headers,
                 body=body,
             )
+        except (OSError, HTTPException):
+            conn.close()
+            if reused:
+                continue
+
+            raise
+
+        try:
             resp = conn.getresponse()
             break
-        except ConnectionError as e:
-            retries += 1
-            if retries > 3:
-                raise e
+        except RemoteDisconnected:
+            conn.close()
+            if reused and method.upper() in _idempotent_methods:
+                continue
+
+            raise
+        except (OSError, HTTPException):
+            conn.close()
+            raise
 
-    return TinyResponse(resp, url, stream=stream)
+    res = TinyResponse(resp, url, stream=stream)
+
+    if not stream:
+        if resp.will_close:
+            conn.close()
+        else:
+            pool[key] = conn
+
+    return res
 
 
 def request(
@@ -1,6 +1,7 @@
 """Utility functions for services."""
 
 import hashlib
+import json
 import os
 import re
 import shutil
@@ -12,7 +13,7 @@ from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
 from textwrap import dedent
-from typing import List
+from typing import Callable, Dict, List, Optional, Tuple
 from urllib.parse import urljoin
 
 import click
@@ -153,10 +154,54 @@ def human_readable_time(t_seconds: float) -> str:
     return " ".join(x)
 
 
-def hash_directory(dir_path: Path) -> str:
+def _load_hash_cache(cache_path: Path) -> Dict[str, Tuple[int, int, str]]:
+    try:
+        data = json.loads(cache_path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(data, dict) or data.get("version") != 1:
+        return {}
+
+    files = data.get("files")
+    if not isinstance(files, dict):
+        return {}
+
+    return {
+        k: tuple(v) for k, v in files.items() if isinstance(v, list) and len(v) == 3
+    }
+
+
+def _save_hash_cache(cache_path: Path, files: Dict[str, Tuple[int, int, str]]):
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"version": 1, "files": files}))
+        os.replace(tmp, cache_path)
+    except OSError:
+        # the cache is only an optimization
+        ...
+
+
+def hash_directory(
+    dir_path: Path,
+    *,
+    cache_path: Optional[Path] = None,
+    echo: Callable[..., None] = click.secho,
+) -> str:
+    """Hash the contents of a directory, respecting its `.dockerignore`.
+
+    If `cache_path` is given, per-file digests are persisted there keyed on
+    the file's mtime and size, and only files that changed since the last
+    call are re-read.
+
+    Progress is reported through `echo`, which takes the same arguments as
+    `click.secho`.
+    """
     # todo(maximsmol): store per-file hashes to show which files triggered a version change
-    click.secho("Calculating workflow version based on file content hash", bold=True)
-    click.secho("  Disable with --disable-auto-version/-d", italic=True, dim=True)
+    echo("Calculating workflow version based on file content hash", bold=True)
+    echo("  Disable with --disable-auto-version/-d", italic=True, dim=True)
 
     m = hashlib.new("sha256")
     m.update(current_workspace().encode("utf-8"))
@@ -165,7 +210,7 @@ def hash_directory(dir_path: Path) -> str:
     exclude: List[str] = ["/.latch", ".git"]
     try:
         with ignore_file.open("r") as f:
-            click.secho("  Using .dockerignore", italic=True)
+            echo("  Using .dockerignore", italic=True)
 
             for l in f:
                 l = l.strip()
@@ -184,6 +229,12 @@ def hash_directory(dir_path: Path) -> str:
     paths = list(exclude_paths(dir_path, exclude))
     paths.sort()
 
+    cached: Dict[str, Tuple[int, int, str]] = {}
+    if cache_path is not None:
+        cached = _load_hash_cache(cache_path)
+
+    files: Dict[str, Tuple[int, int, str]] = {}
+
     for item in paths:
         p = Path(dir_path / item)
 
@@ -196,7 +247,7 @@ def hash_directory(dir_path: Path) -> str:
 
         file_size = p_stat.st_size
         if not stat.S_ISREG(p_stat.st_mode):
-            click.secho(
+            echo(
                 f"{p.relative_to(dir_path.resolve())} is not a regular file."
                 " Ignoring contents",
                 fg="yellow",
@@ -205,7 +256,7 @@ def hash_directory(dir_path: Path) -> str:
             continue
 
         if file_size > latch_constants.file_max_size:
-            click.secho(
+            echo(
                 f"{p.relative_to(dir_path.resolve())} is too large"
                 f" ({with_si_suffix(file_size)}) to checksum. Ignoring contents",
                 fg="yellow",
@@ -213,7 +264,19 @@ def hash_directory(dir_path: Path) -> str:
             )
             continue
 
-        m.update(p.read_bytes())
+        entry = cached.get(item)
+        if entry is None or entry[:2] != (p_stat.st_mtime_ns, file_size):
+            entry = (
+                p_stat.st_mtime_ns,
+                file_size,
+                hashlib.sha256(p.read_bytes()).hexdigest(),
+            )
+
+        files[item] = entry
+        m.update(entry[2].encode("utf-8"))
+
+    if cache_path is not None and files != cached:
+        _save_hash_cache(cache_path, files)
 
     return m.hexdigest()
 
@@ -387,11 +450,16 @@ class WorkflowType(Enum):
     nextflow = "nextflow"
 
 
+_ascii_identifier_suffix_table = str.maketrans({
+    chr(c): "_" for c in range(128) if not f"_{chr(c)}".isidentifier()
+})
+
+
 def identifier_suffix_from_str(x: str) -> str:
-    res = ""
-    for c in x:
-        res += c if f"_{c}".isidentifier() else "_"
-    return res
+    if x.isascii():
+        return x.translate(_ascii_identifier_suffix_table)
+
+    return "".join(c if f"_{c}".isidentifier() else "_" for c in x)
 
 
 def identifier_from_str(x: str) -> str:
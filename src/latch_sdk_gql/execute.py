@@ -6,9 +6,14 @@ except ImportError:
     from functools import lru_cache as cache
 
 import time
-from typing import Dict, Optional
+from collections import OrderedDict
+from copy import deepcopy
+from functools import lru_cache
+from threading import Lock, local
+from typing import Dict, Hashable, Optional, Tuple, Union
 
 import gql
+from gql.client import SyncClientSession
 from gql.transport.requests import RequestsHTTPTransport
 from graphql import DocumentNode
 
@@ -18,7 +23,7 @@ from latch_sdk_gql import AuthenticationError, JsonValue
 
 
 @cache
-def _get_client() -> gql.Client:
+def _get_auth_header() -> str:
     auth_header: Optional[str] = None
 
     if auth_header is None:
@@ -36,25 +41,112 @@ def _get_client() -> gql.Client:
             "Unable to find credentials to connect to gql server, aborting"
         )
 
-    return gql.Client(
-        transport=RequestsHTTPTransport(
-            url=config.gql, headers={"Authorization": auth_header}
+    return auth_header
+
+
+_sessions = local()
+
+
+def _get_session() -> SyncClientSession:
+    # note: `gql.Client.execute` connects and closes the transport on
+    # every call, which throws away the underlying `requests.Session` (and its
+    # keep-alive connections). Connect once and reuse the session instead.
+    #
+    # `requests.Session` is not documented to be thread safe, so each thread
+    # (e.g. concurrent downloads) gets its own
+    session: Optional[SyncClientSession] = getattr(_sessions, "session", None)
+    if session is None:
+        transport = RequestsHTTPTransport(
+            url=config.gql, headers={"Authorization": _get_auth_header()}
         )
-    )
+        session = gql.Client(transport=transport).connect_sync()
+        _sessions.session = session
+
+    return session
+
+
+def _reset_sessions():
+    global _sessions
+    _sessions = local()
+
+
+# forked children (e.g. `ProcessPoolExecutor` workers) must not share the
+# parent's pooled sockets
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_sessions)
+
+
+@lru_cache(maxsize=256)
+def _parse(document: str) -> DocumentNode:
+    return gql.gql(document)
+
+
+_response_cache_size = 512
+_response_cache: "OrderedDict[Hashable, Tuple[float, JsonValue]]" = OrderedDict()
+_response_cache_lock = Lock()
+
+
+def _freeze(x: JsonValue) -> Hashable:
+    if isinstance(x, dict):
+        return frozenset((k, _freeze(v)) for k, v in x.items())
+
+    if isinstance(x, list):
+        return tuple(_freeze(v) for v in x)
+
+    return x
+
+
+def _cache_key(
+    document: Union[str, DocumentNode], variables: Optional[Dict[str, JsonValue]]
+) -> Optional[Hashable]:
+    if isinstance(document, str):
+        source = document
+    elif document.loc is not None:
+        source = document.loc.source.body
+    else:
+        return None
+
+    return (source, _freeze(variables))
 
 
 def execute(
-    document: DocumentNode,
+    document: Union[str, DocumentNode],
     variables: Optional[Dict[str, JsonValue]] = None,
     *,
     max_retries: int = 5,
     backoff: float = 0.1,
+    use_cache: bool = False,
+    ttl: float = 30.0,
 ):
-    client = _get_client()
+    """Run a GraphQL document against the Latch API.
+
+    If `use_cache` is set, the result is memoized in-process for `ttl` seconds,
+    keyed on the document source and variables. Only use this for read-only
+    queries whose results are not expected to change within that window.
+    """
+    key = _cache_key(document, variables) if use_cache else None
+    if key is not None:
+        with _response_cache_lock:
+            hit = _response_cache.get(key)
+            if hit is not None:
+                if time.monotonic() < hit[0]:
+                    _response_cache.move_to_end(key)
+                else:
+                    del _response_cache[key]
+                    hit = None
+
+        if hit is not None:
+            return deepcopy(hit[1])
+
+    if isinstance(document, str):
+        document = _parse(document)
+
+    session = _get_session()
     retries = 0
     while True:
         try:
-            return client.execute(document, variables)
+            res = session.execute(document, variables)
+            break
         except Exception:
             if retries >= max_retries:
                 raise
@@ -62,5 +154,15 @@ def execute(
             time.sleep(backoff * 2**retries)
             retries += 1
 
+    if key is not None:
+        entry = (time.monotonic() + ttl, deepcopy(res))
+        with _response_cache_lock:
+            _response_cache[key] = entry
+            _response_cache.move_to_end(key)
+            while len(_response_cache) > _response_cache_size:
+                _response_cache.popitem(last=False)
+
+    return res
+
 
 # todo(ayush): add generator impl for subscriptions
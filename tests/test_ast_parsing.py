@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import pytest
+
+import latch_cli.centromere.ast_parsing as ast_parsing
+from latch_cli.centromere.ast_parsing import get_flyte_objects
+
+
+@pytest.fixture
+def module(tmp_path: Path) -> Path:
+    root = tmp_path / "wf"
+    root.mkdir()
+    (root / "main.py").write_text(
+        "@small_task\ndef a(): ...\n\n@brand_new_task\ndef b(): ...\n\n"
+        "@workflow\ndef w(): ...\n"
+    )
+
+    return root
+
+
+def names(module: Path, cache_path: Path):
+    return sorted(
+        (x.type, x.name) for x in get_flyte_objects(module, cache_path=cache_path)
+    )
+
+
+def test_cache_reused_for_unchanged_files(
+    module: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    cache_path = tmp_path / "flyte_objects.cache"
+    first = names(module, cache_path)
+    assert first == [("task", "wf.main.a"), ("workflow", "wf.main.w")]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("unchanged file was re-parsed")
+
+    monkeypatch.setattr(ast_parsing.ast, "parse", fail)
+    assert names(module, cache_path) == first
+
+
+def test_cache_invalidated_when_task_decorators_change(
+    module: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    cache_path = tmp_path / "flyte_objects.cache"
+    assert ("task", "wf.main.b") not in names(module, cache_path)
+
+    # e.g. an SDK upgrade that adds a new task decorator
+    monkeypatch.setattr(
+        ast_parsing, "task_decorators", ast_parsing.task_decorators | {"brand_new_task"}
+    )
+    assert ("task", "wf.main.b") in names(module, cache_path)
@@ -0,0 +1,91 @@
+import json
+from dataclasses import asdict, replace
+from pathlib import Path
+
+import click
+import pytest
+import yaml
+
+from latch_cli.docker_utils import DockerfileBuilder, get_default_dockerfile
+from latch_cli.utils import WorkflowType
+from latch_cli.workflow_config import LatchWorkflowConfig
+
+config = LatchWorkflowConfig(
+    latch_version="2.0.0", base_image="latch-base:test", date="2024-01-01"
+)
+
+
+def test_r_dependencies_installed_before_conda(tmp_path: Path):
+    r_env = tmp_path / "environment.R"
+    r_env.write_text('install.packages("dplyr")\n')
+
+    conda_env = tmp_path / "environment.yaml"
+    conda_env.write_text("name: test-env\ndependencies:\n  - samtools\n")
+
+    dest = tmp_path / "Dockerfile"
+    builder = DockerfileBuilder(
+        tmp_path, config, WorkflowType.latchbiosdk, r_env=r_env, conda_env=conda_env
+    )
+    assert builder.generate(dest=dest, overwrite=True)
+
+    content = dest.read_text()
+    order = [
+        "# Install rig the R installation manager",
+        "# Install R\n",
+        "run Rscript /opt/latch/environment.R",
+        "# Install Mambaforge",
+        "env PATH=/opt/conda/bin:$PATH",
+        "--name test-env",
+        "copy . /root/",
+    ]
+    idxs = [content.index(x) for x in order]
+    assert idxs == sorted(idxs)
+
+
+def test_progress_printed_when_inference_fails(tmp_path: Path, capsys):
+    conda_env = tmp_path / "environment.yaml"
+    conda_env.write_text("name: [unterminated\n")
+
+    builder = DockerfileBuilder(
+        tmp_path,
+        config,
+        WorkflowType.latchbiosdk,
+        apt_requirements=tmp_path / "system-requirements.txt",
+        conda_env=conda_env,
+    )
+    with pytest.raises(yaml.YAMLError):
+        builder.generate(dest=tmp_path / "Dockerfile", overwrite=True)
+
+    out = capsys.readouterr().out
+    assert "System dependencies installation phase" in out
+    assert "Conda dependencies installation phase" in out
+    assert not (tmp_path / "Dockerfile").exists()
+
+
+def test_default_dockerfile_regenerated_only_when_inputs_change(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(click, "confirm", lambda *args, **kwargs: True)
+
+    config_path = tmp_path / ".latch" / "config"
+    config_path.parent.mkdir()
+    config_path.write_text(json.dumps(asdict(config)))
+
+    dockerfile = get_default_dockerfile(tmp_path, wf_type=WorkflowType.latchbiosdk)
+    assert dockerfile == tmp_path / ".latch" / "Dockerfile"
+    assert "from latch-base:test" in dockerfile.read_text()
+
+    # unchanged inputs leave the existing file alone
+    dockerfile.write_text("stale")
+    get_default_dockerfile(tmp_path, wf_type=WorkflowType.latchbiosdk)
+    assert dockerfile.read_text() == "stale"
+
+    # a config change forces a rewrite
+    config_path.write_text(json.dumps(asdict(replace(config, base_image="other"))))
+    get_default_dockerfile(tmp_path, wf_type=WorkflowType.latchbiosdk)
+    assert "from other" in dockerfile.read_text()
+
+    # so does deleting the generated file
+    dockerfile.unlink()
+    get_default_dockerfile(tmp_path, wf_type=WorkflowType.latchbiosdk)
+    assert "from other" in dockerfile.read_text()
@@ -0,0 +1,78 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import pytest
+
+import latch_sdk_gql.execute as gql_execute
+
+query = "query Test($x: Int!) { test(x: $x) }"
+
+
+class FakeSession:
+    def __init__(self):
+        self.calls: List[object] = []
+
+    def execute(self, document, variables=None):
+        self.calls.append(variables)
+        return {"test": len(self.calls)}
+
+
+@pytest.fixture
+def session(monkeypatch: pytest.MonkeyPatch) -> FakeSession:
+    res = FakeSession()
+    monkeypatch.setattr(gql_execute, "_get_session", lambda: res)
+    monkeypatch.setattr(gql_execute, "_response_cache", OrderedDict())
+    return res
+
+
+def test_cached_response_expires(session: FakeSession, monkeypatch: pytest.MonkeyPatch):
+    now = 1000.0
+    monkeypatch.setattr(gql_execute.time, "monotonic", lambda: now)
+
+    assert gql_execute.execute(query, {"x": 1}, use_cache=True, ttl=10) == {"test": 1}
+    assert gql_execute.execute(query, {"x": 1}, use_cache=True, ttl=10) == {"test": 1}
+    assert len(session.calls) == 1
+
+    now += 11
+    assert gql_execute.execute(query, {"x": 1}, use_cache=True, ttl=10) == {"test": 2}
+    assert len(session.calls) == 2
+
+
+def test_cache_evicts_least_recently_used(
+    session: FakeSession, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(gql_execute, "_response_cache_size", 2)
+
+    gql_execute.execute(query, {"x": 1}, use_cache=True)
+    gql_execute.execute(query, {"x": 2}, use_cache=True)
+    # touch 1 so that 2 is the least recently used entry
+    gql_execute.execute(query, {"x": 1}, use_cache=True)
+    gql_execute.execute(query, {"x": 3}, use_cache=True)
+    assert len(session.calls) == 3
+
+    gql_execute.execute(query, {"x": 1}, use_cache=True)
+    assert len(session.calls) == 3
+
+    gql_execute.execute(query, {"x": 2}, use_cache=True)
+    assert len(session.calls) == 4
+
+
+def test_uncached_calls_always_query(session: FakeSession):
+    gql_execute.execute(query, {"x": 1})
+    gql_execute.execute(query, {"x": 1})
+    assert len(session.calls) == 2
+
+
+def test_session_per_thread(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(gql_execute, "_get_auth_header", lambda: "Latch-SDK-Token x")
+    monkeypatch.setattr(gql_execute, "_sessions", threading.local())
+
+    main = gql_execute._get_session()
+    assert gql_execute._get_session() is main
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        other = pool.submit(gql_execute._get_session).result()
+
+    assert other is not main
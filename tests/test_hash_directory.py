@@ -0,0 +1,70 @@
+import os
+from pathlib import Path
+
+import pytest
+
+import latch_cli.utils as latch_utils
+from latch_cli.utils import hash_directory
+
+
+def quiet(*args, **kwargs): ...
+
+
+@pytest.fixture
+def pkg_root(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setattr(latch_utils, "current_workspace", lambda: "1")
+
+    root = tmp_path / "wf"
+    (root / "wf").mkdir(parents=True)
+    (root / "wf" / "__init__.py").write_text("print('hello')\n")
+    (root / "Dockerfile").write_text("from scratch\n")
+
+    return root
+
+
+def test_cached_hash_matches_cold_hash(pkg_root: Path, tmp_path: Path):
+    cache_path = tmp_path / "hash.cache"
+
+    cold = hash_directory(pkg_root, echo=quiet)
+    first = hash_directory(pkg_root, cache_path=cache_path, echo=quiet)
+    assert cache_path.exists()
+
+    warm = hash_directory(pkg_root, cache_path=cache_path, echo=quiet)
+    assert cold == first == warm
+
+
+def test_cache_is_used_for_unchanged_files(pkg_root: Path, tmp_path: Path):
+    cache_path = tmp_path / "hash.cache"
+    before = hash_directory(pkg_root, cache_path=cache_path, echo=quiet)
+
+    # same size and mtime, so the cached digest is trusted
+    p = pkg_root / "wf" / "__init__.py"
+    p_stat = p.stat()
+    p.write_text("print('HELLO')\n")
+    os.utime(p, ns=(p_stat.st_atime_ns, p_stat.st_mtime_ns))
+
+    assert hash_directory(pkg_root, cache_path=cache_path, echo=quiet) == before
+
+
+def test_same_size_edit_changes_hash(pkg_root: Path, tmp_path: Path):
+    cache_path = tmp_path / "hash.cache"
+    before = hash_directory(pkg_root, cache_path=cache_path, echo=quiet)
+
+    p = pkg_root / "wf" / "__init__.py"
+    p_stat = p.stat()
+    p.write_text("print('HELLO')\n")
+    os.utime(p, ns=(p_stat.st_atime_ns, p_stat.st_mtime_ns + 1_000_000))
+    assert p.stat().st_size == p_stat.st_size
+
+    after = hash_directory(pkg_root, cache_path=cache_path, echo=quiet)
+    assert after != before
+    assert after == hash_directory(pkg_root, echo=quiet)
+
+
+def test_malformed_cache_is_ignored(pkg_root: Path, tmp_path: Path):
+    cache_path = tmp_path / "hash.cache"
+    cache_path.write_text('{"version": 1}')
+
+    assert hash_directory(pkg_root, cache_path=cache_path, echo=quiet) == (
+        hash_directory(pkg_root, echo=quiet)
+    )
@@ -0,0 +1,106 @@
+from typing import List
+
+import pytest
+from gql.transport.exceptions import TransportQueryError
+
+import latch.types.file as latch_file
+from latch.types.file import _PathResolver
+
+
+class FakeExecute:
+    def __init__(self, *, fail_batches: bool = False):
+        self.fail_batches = fail_batches
+        self.batches: List[List[str]] = []
+        self.single: List[str] = []
+
+    def __call__(self, document, variables=None, **kwargs):
+        if isinstance(document, str):
+            path = variables["argPath"]
+            self.single.append(path)
+            return {"ldataResolvePathData": {"name": path.rsplit("/", 1)[-1]}}
+
+        sels = document.definitions[0].selection_set.selections
+        paths = [sel.arguments[0].value.value for sel in sels]
+        self.batches.append(paths)
+
+        if self.fail_batches:
+            raise TransportQueryError("invalid path")
+
+        return {
+            sel.alias.value: {"name": path.rsplit("/", 1)[-1]}
+            for sel, path in zip(sels, paths)
+        }
+
+
+@pytest.fixture
+def fake_execute(monkeypatch: pytest.MonkeyPatch) -> FakeExecute:
+    res = FakeExecute()
+    monkeypatch.setattr(latch_file, "execute", res)
+    return res
+
+
+def test_registered_paths_resolved_in_one_batch(fake_execute: FakeExecute):
+    resolver = _PathResolver()
+    for i in range(3):
+        resolver.add(f"latch://1.node/{i}")
+
+    assert resolver.get("latch://1.node/1") == "1"
+    assert len(fake_execute.batches) == 1
+    assert sorted(fake_execute.batches[0]) == [f"latch://1.node/{i}" for i in range(3)]
+
+    assert resolver.get("latch://1.node/0") == "0"
+    assert resolver.get("latch://1.node/2") == "2"
+    assert len(fake_execute.batches) == 1
+    assert fake_execute.single == []
+
+
+def test_names_dropped_after_lookup(fake_execute: FakeExecute):
+    resolver = _PathResolver()
+    resolver.add("latch://1.node/0")
+
+    assert resolver.get("latch://1.node/0") == "0"
+    assert resolver.get("latch://1.node/0") == "0"
+    assert len(fake_execute.batches) == 2
+
+
+def test_batches_are_capped(fake_execute: FakeExecute):
+    resolver = _PathResolver()
+    resolver.batch_size = 2
+    for i in range(5):
+        resolver.add(f"latch://1.node/{i}")
+
+    assert resolver.get("latch://1.node/4") == "4"
+    assert len(fake_execute.batches[0]) == 2
+    assert "latch://1.node/4" in fake_execute.batches[0]
+
+    resolver.flush()
+    assert [len(x) for x in fake_execute.batches] == [2, 2, 1]
+
+
+def test_pending_paths_are_capped(fake_execute: FakeExecute):
+    resolver = _PathResolver()
+    resolver.max_pending = 2
+    for i in range(5):
+        resolver.add(f"latch://1.node/{i}")
+
+    resolver.flush()
+    assert sum(len(x) for x in fake_execute.batches) == 2
+
+    # never-read names are evicted instead of accumulating
+    for i in range(5, 7):
+        resolver.add(f"latch://1.node/{i}")
+
+    resolver.flush()
+    assert len(resolver._names) <= 2
+
+
+def test_failed_batch_falls_back_to_single_lookup(fake_execute: FakeExecute):
+    fake_execute.fail_batches = True
+
+    resolver = _PathResolver()
+    resolver.add("latch://1.node/0")
+    resolver.add("latch://1.node/1")
+
+    assert resolver.get("latch://1.node/1") == "1"
+    assert len(fake_execute.batches) == 1
+    assert fake_execute.single == ["latch://1.node/1"]